@@ -1,11 +1,27 @@
 import sqlite3
 import os
+import logging
+import threading
+
+from bulk_load import bulk_load
+from pool import close_pool, get_pool
+
+logger = logging.getLogger(__name__)
 
 # Define the database file name
 DB_FILE = 'database.db'
 
-def setup_database():
-    """Sets up a dummy SQLite database for demonstration."""
+def setup_database(source=None, **load_options):
+    """
+    Sets up a dummy SQLite database for demonstration.
+
+    Args:
+        source: Optional CSV or JSONL file (or iterable of (name, age)
+                rows) to bulk load into users instead of the dummy rows.
+        load_options: Passed on to bulk_load, e.g. indexes=('age',).
+    """
+    # Pooled connections would keep the old file open, so drop them first
+    close_pool(DB_FILE)
     # Remove old database file if it exists
     if os.path.exists(DB_FILE):
         os.remove(DB_FILE)
@@ -22,6 +38,12 @@ def setup_database():
                 age INTEGER
             )
         ''')
+        if source is not None:
+            conn.commit()
+            load_options.setdefault('columns', ('name', 'age'))
+            bulk_load(conn, 'users', source, **load_options)
+            print("Database setup complete.")
+            return
         # Insert some dummy data
         users_data = [
             ('Alice', 30),
@@ -38,43 +60,71 @@ def setup_database():
         if conn:
             conn.close()
 
+# Connections checked out by each thread, keyed by pool, as
+# [connection, nesting depth]
+_held = threading.local()
+
+def _held_connections():
+    if not hasattr(_held, 'connections'):
+        _held.connections = {}
+    return _held.connections
+
 class DatabaseConnection:
     """
     A custom context manager for handling SQLite database connections.
 
+    Connections come from a shared pool per database file and go back to
+    it on exit instead of being opened and closed each time. A nested
+    'with' on the same thread and database reuses the outer block's
+    connection; it is returned to the pool when the outermost block exits.
+
     Attributes:
         db_name (str): The name of the database file.
         connection (sqlite3.Connection): The database connection object.
     """
 
-    def __init__(self, db_name):
+    def __init__(self, db_name, pool_size=4, pragmas=None):
         """
         Initializes the DatabaseConnection context manager.
 
         Args:
             db_name (str): The name of the database file to connect to.
+            pool_size (int): Maximum pooled connections for this database.
+            pragmas (dict): PRAGMAs for new pooled connections, defaulting
+                            to pool.DEFAULT_PRAGMAS. The pool size and
+                            PRAGMAs apply when the database is first used.
         """
         self.db_name = db_name
+        self.pool = get_pool(db_name, size=pool_size, pragmas=pragmas)
         self.connection = None
-        print(f"Initializing connection to {self.db_name}...")
+        logger.debug("Initializing connection to %s", self.db_name)
 
     def __enter__(self):
         """
-        Establishes the database connection when entering the 'with' block.
+        Checks out a connection when entering the 'with' block.
 
         Returns:
             sqlite3.Connection: The active database connection object.
 
         Raises:
             sqlite3.Error: If connection fails.
+            TimeoutError: If every pooled connection stays busy.
         """
-        try:
-            print("Opening database connection...")
-            self.connection = sqlite3.connect(self.db_name)
-            return self.connection
-        except sqlite3.Error as e:
-            print(f"Failed to connect to database: {e}")
-            raise # Re-raise the exception so it's not swallowed
+        held = _held_connections()
+        entry = held.get(self.pool)
+        if entry is not None:
+            entry[1] += 1
+            logger.debug("Reusing open connection to %s", self.db_name)
+        else:
+            try:
+                logger.debug("Checking out connection to %s", self.db_name)
+                entry = [self.pool.acquire(), 1]
+            except sqlite3.Error as e:
+                logger.debug("Failed to connect to database: %s", e)
+                raise # Re-raise the exception so it's not swallowed
+            held[self.pool] = entry
+        self.connection = entry[0]
+        return self.connection
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """
@@ -88,19 +138,30 @@ class DatabaseConnection:
         Returns:
             bool: False, so any exceptions are re-raised after cleanup.
         """
-        if self.connection:
-            print("Closing database connection...")
-            self.connection.close()
+        held = _held_connections()
+        entry = held.get(self.pool)
+        if entry is not None:
+            entry[1] -= 1
+            if entry[1] == 0:
+                # Outermost block: uncommitted work is rolled back on
+                # release, as closing the connection did.
+                logger.debug("Returning connection to %s", self.db_name)
+                del held[self.pool]
+                self.pool.release(entry[0])
+        self.connection = None
         # If an exception occurred, exc_type, exc_val, and exc_tb will be set.
         # If we return False (or None), any exception will be re-raised.
         # If we return True, the exception will be suppressed.
         # We generally want to know about errors, so we'll let them propagate.
         if exc_type:
-            print(f"An exception occurred: {exc_val}")
+            logger.debug("An exception occurred: %s", exc_val)
         return False # Do not suppress exceptions
 
 # Main execution block
 if __name__ == "__main__":
+    # Show the connection lifecycle messages
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s")
+
     # Set up the database first
     setup_database()
 
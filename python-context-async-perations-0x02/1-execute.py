@@ -1,20 +1,68 @@
 import sqlite3
 
 class ExecuteQuery:
-    def __init__(self, query, params):
+    """
+    Context manager that runs a query and hands its results to the block.
+
+    mode selects what the block receives:
+        'all'     - a list of every row (fetchall)
+        'rows'    - a lazy iterator over the rows
+        'columns' - a lazy iterator over column batches, each a dict of
+                    column name to the list of that column's values
+    The lazy modes read arraysize rows at a time with fetchmany, and the
+    connection stays open until the block exits.
+    """
+
+    MODES = ('all', 'rows', 'columns')
+
+    def __init__(self, query, params=(), mode='all', arraysize=1000,
+                 database="users.db"):
+        if mode not in self.MODES:
+            raise ValueError(f"mode must be one of {self.MODES}")
         self.query = query
         self.params = params
+        self.mode = mode
+        self.arraysize = arraysize
+        self.database = database
+        self.conn = None
 
     def __enter__(self):
-        self.conn = sqlite3.connect("users.db")
+        self.conn = sqlite3.connect(self.database)
         self.cursor = self.conn.cursor()
-        self.cursor.execute(self.query, self.params)
+        self.cursor.arraysize = self.arraysize
+        try:
+            self.cursor.execute(self.query, self.params)
+        except BaseException:
+            self.conn.close()
+            raise
+        if self.mode == 'rows':
+            return self._rows()
+        if self.mode == 'columns':
+            return self._column_batches()
         return self.cursor.fetchall()
 
+    def _batches(self):
+        while True:
+            rows = self.cursor.fetchmany()
+            if not rows:
+                return
+            yield rows
+
+    def _rows(self):
+        for rows in self._batches():
+            yield from rows
+
+    def _column_batches(self):
+        names = [column[0] for column in self.cursor.description]
+        for rows in self._batches():
+            yield dict(zip(names, map(list, zip(*rows))))
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.conn:
             self.conn.close()
+            self.conn = None
 
-with ExecuteQuery("SELECT * FROM users WHERE age > ?", (25,)) as results:
-    for row in results:
-        print(row)
\ No newline at end of file
+if __name__ == "__main__":
+    with ExecuteQuery("SELECT * FROM users WHERE age > ?", (25,)) as results:
+        for row in results:
+            print(row)
@@ -3,11 +3,22 @@ import aiosqlite
 import os
 import time
 
+from async_executor import QueryExecutor
+from bulk_load import async_bulk_load
+from async_pool import AsyncRouter
+
 # Define the database file name
 DB_FILE = 'async_database.db'
 
-async def setup_async_database():
-    """Sets up a dummy SQLite database asynchronously."""
+async def setup_async_database(source=None, **load_options):
+    """
+    Sets up a dummy SQLite database asynchronously.
+
+    Args:
+        source: Optional CSV or JSONL file (or iterable of (name, age)
+                rows) to bulk load into users instead of the dummy rows.
+        load_options: Passed on to async_bulk_load.
+    """
     if os.path.exists(DB_FILE):
         os.remove(DB_FILE)
 
@@ -19,6 +30,12 @@ async def setup_async_database():
                 age INTEGER
             )
         ''')
+        if source is not None:
+            await db.commit()
+            load_options.setdefault('columns', ('name', 'age'))
+            await async_bulk_load(db, 'users', source, **load_options)
+            print("Async database setup complete.")
+            return
         users_data = [
             ('Alice', 30),
             ('Bob', 24),
@@ -35,19 +52,31 @@ async def setup_async_database():
         await db.commit()
         print("Async database setup complete.")
 
-async def async_fetch_users():
-    """Fetches all users from the database asynchronously."""
+def _connection(router, access):
+    # A pooled connection when a router is given, else a fresh one.
+    if router is None:
+        return aiosqlite.connect(DB_FILE)
+    return router.acquire(access)
+
+async def async_fetch_users(router=None):
+    """
+    Fetches all users from the database asynchronously, on one of the
+    router's readers if a router is given.
+    """
     print("Fetching all users...")
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _connection(router, 'read') as db:
         async with db.execute("SELECT * FROM users") as cursor:
             results = await cursor.fetchall()
             print(f"Fetched {len(results)} users.")
             return results
 
-async def async_fetch_older_users():
-    """Fetches users older than 40 asynchronously."""
+async def async_fetch_older_users(router=None):
+    """
+    Fetches users older than 40 asynchronously, on one of the router's
+    readers if a router is given.
+    """
     print("Fetching users older than 40...")
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _connection(router, 'read') as db:
         async with db.execute(
             "SELECT * FROM users WHERE age > ?", (40,)
             ) as cursor:
@@ -55,29 +84,47 @@ async def async_fetch_older_users():
             print(f"Fetched {len(results)} users older than 40.")
             return results
 
-async def fetch_concurrently():
-    """Runs both fetch queries concurrently and prints results."""
+# Queries run by fetch_concurrently, as (label, sql, params)
+QUERIES = [
+    ("All Users", "SELECT * FROM users", ()),
+    ("Users Older Than 40", "SELECT * FROM users WHERE age > ?", (40,)),
+]
+
+async def fetch_concurrently(queries=QUERIES, concurrency=None,
+                             timeout=None, pool_size=4):
+    """
+    Runs the queries concurrently over a shared AsyncRouter, reads on its
+    read-only pool, and prints the results.
+
+    Args:
+        queries (list): (label, sql, params) tuples.
+        concurrency (int): Queries in flight at once, by default one per
+                           pooled connection.
+        timeout (float): Per-query timeout in seconds.
+        pool_size (int): Reader connections in the shared pool.
+
+    Returns:
+        list: The QueryResult of each query, in query order.
+    """
     print("Starting concurrent fetches...")
     start_time = time.time()
 
-    # Use asyncio.gather to run both functions concurrently
-    all_users_task = async_fetch_users()
-    older_users_task = async_fetch_older_users()
-
-    results = await asyncio.gather(all_users_task, older_users_task)
+    async with AsyncRouter(DB_FILE, readers=pool_size) as router:
+        executor = QueryExecutor(router, concurrency, timeout)
+        results = await executor.run(
+            [(sql, params) for _, sql, params in queries])
 
     end_time = time.time()
     print(f"\nConcurrent fetches finished in {end_time - start_time:.4f} seconds.")
 
-    all_users, older_users = results
-
-    print("\n--- All Users ---")
-    for user in all_users:
-        print(user)
-
-    print("\n--- Users Older Than 40 ---")
-    for user in older_users:
-        print(user)
+    for (label, _, _), result in zip(queries, results):
+        print(f"\n--- {label} ({result.seconds * 1000:.2f} ms) ---")
+        if result.error is not None:
+            print(f"Query failed: {result.error!r}")
+            continue
+        for user in result.rows:
+            print(user)
+    return results
 
 # Main execution block
 if __name__ == "__main__":
@@ -0,0 +1,105 @@
+"""
+Runs many queries concurrently over a shared AsyncConnectionPool or
+AsyncRouter.
+
+At most `concurrency` queries run at once, each may have a timeout, and
+results are handed back as they complete along with how long each query
+waited for a connection and how long it ran. Each query runs in its own
+transaction, committed when it succeeds.
+"""
+import asyncio
+import collections
+import time
+
+QueryResult = collections.namedtuple(
+    'QueryResult', 'index query params rows error wait_seconds seconds')
+QueryResult.__doc__ = """
+Outcome of one query: rows on success, otherwise error holds the
+exception (TimeoutError when the query ran past its timeout).
+"""
+
+
+def _normalize(query):
+    # Queries are SQL strings or (sql, params) pairs.
+    if isinstance(query, str):
+        return query, ()
+    sql, params = query
+    return sql, params
+
+
+class QueryExecutor:
+    """
+    Executes queries with bounded parallelism.
+
+    Args:
+        pool (AsyncConnectionPool or AsyncRouter): Where the queries run;
+                                                   a router sends reads
+                                                   to its readers.
+        concurrency (int): Queries in flight at once; the pool size by
+                           default.
+        timeout (float): Default per-query timeout in seconds, covering
+                         the wait for a connection and the query itself.
+    """
+
+    def __init__(self, pool, concurrency=None, timeout=None):
+        self.pool = pool
+        self.concurrency = concurrency or pool.size
+        self.timeout = timeout
+
+    async def _fetch(self, sql, params):
+        async with self.pool.acquire_for(sql) as db:
+            start = time.perf_counter()
+            try:
+                rows = await db.execute_fetchall(sql, params)
+                # Each query is its own transaction.
+                if db.in_transaction:
+                    await db.commit()
+                return rows, start
+            except asyncio.CancelledError:
+                # The statement keeps running in the connection's thread
+                # unless it is interrupted.
+                await db.interrupt()
+                raise
+
+    async def _run(self, limit, index, query, timeout):
+        sql, params = _normalize(query)
+        queued = time.perf_counter()
+        async with limit:
+            start = time.perf_counter()
+            rows = error = None
+            try:
+                rows, start = await asyncio.wait_for(
+                    self._fetch(sql, params), timeout)
+            except Exception as e:
+                error = e
+            end = time.perf_counter()
+        return QueryResult(index, sql, params, rows, error,
+                           start - queued, end - start)
+
+    async def as_completed(self, queries, timeout=None):
+        """
+        Async generator yielding a QueryResult per query, in completion
+        order. Leaving the loop early, or cancelling the consumer, cancels
+        the queries still pending.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        limit = asyncio.Semaphore(self.concurrency)
+        pending = {asyncio.ensure_future(self._run(limit, i, q, timeout))
+                   for i, q in enumerate(queries)}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def run(self, queries, timeout=None):
+        """Runs every query and returns their results in query order."""
+        results = [result async for result
+                   in self.as_completed(queries, timeout)]
+        return sorted(results, key=lambda result: result.index)
@@ -0,0 +1,249 @@
+"""
+Pools of aiosqlite connections shared by coroutines.
+
+Each aiosqlite connection runs in its own thread, so opening one per
+query pays a thread start as well as the connect. Pooled connections are
+opened once, set up with PRAGMAs, and handed out to one coroutine at a
+time; work left uncommitted when a connection is returned is rolled back.
+
+AsyncRouter pairs a single writer connection with a pool of read-only
+connections. In WAL mode readers see the last committed state while the
+writer works, so concurrent reads never wait on writes.
+"""
+import asyncio
+import contextlib
+import os
+import time
+from pathlib import Path
+
+import aiosqlite
+
+from pool import DEFAULT_PRAGMAS, access_for, pragma_statements
+
+
+class AsyncConnectionPool:
+    """
+    Pool of aiosqlite connections to one SQLite database.
+
+    Args:
+        database (str): Path of the database file.
+        size (int): Maximum number of open connections.
+        min_size (int): Connections opened by open() and kept warm.
+        timeout (float): Seconds acquire() waits for a free connection
+                         before raising TimeoutError.
+        pragmas (dict): PRAGMAs applied to every new connection.
+        read_only (bool): Open connections with mode=ro; any write through
+                          them fails.
+    """
+
+    def __init__(self, database, size=4, min_size=1, timeout=5.0,
+                 pragmas=None, read_only=False):
+        if not 0 <= min_size <= size or size < 1:
+            raise ValueError("need 0 <= min_size <= size, size >= 1")
+        self.database = database
+        self.size = size
+        self.min_size = min_size
+        self.timeout = timeout
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self.read_only = read_only
+        self._idle = []
+        self._open = 0
+        self._closed = False
+        self._cond = asyncio.Condition()
+        self._stats = dict.fromkeys(
+            ('created', 'closed', 'checkouts', 'waits', 'timeouts'), 0)
+        self._stats['wait_seconds'] = 0.0
+
+    async def _connect(self):
+        path = os.path.abspath(self.database)
+        if self.read_only:
+            db = await aiosqlite.connect(Path(path).as_uri() + '?mode=ro',
+                                         uri=True)
+        else:
+            db = await aiosqlite.connect(path)
+        try:
+            for statement in pragma_statements(self.pragmas,
+                                               self.read_only):
+                await db.execute(statement)
+        except BaseException:
+            await db.close()
+            raise
+        self._stats['created'] += 1
+        return db
+
+    async def open(self):
+        """Opens min_size connections up front."""
+        async with self._cond:
+            missing = self.min_size - self._open
+            self._open += max(missing, 0)
+        if missing <= 0:
+            return
+        try:
+            conns = await asyncio.gather(
+                *(self._connect() for _ in range(missing)))
+        except BaseException:
+            async with self._cond:
+                self._open -= missing
+            raise
+        async with self._cond:
+            self._idle.extend(conns)
+            self._cond.notify_all()
+
+    def _available(self):
+        return self._closed or self._idle or self._open < self.size
+
+    async def _checkout(self, timeout):
+        async with self._cond:
+            if not self._available():
+                self._stats['waits'] += 1
+                started = time.perf_counter()
+                try:
+                    await asyncio.wait_for(
+                        self._cond.wait_for(self._available), timeout)
+                except asyncio.TimeoutError:
+                    self._stats['timeouts'] += 1
+                    raise TimeoutError(f"no connection to {self.database} "
+                                       f"available after {timeout}s")
+                finally:
+                    self._stats['wait_seconds'] += (time.perf_counter()
+                                                    - started)
+            if self._closed:
+                raise RuntimeError("connection pool is closed")
+            self._stats['checkouts'] += 1
+            if self._idle:
+                return self._idle.pop()
+            self._open += 1
+        try:
+            return await self._connect()
+        except BaseException:
+            async with self._cond:
+                self._open -= 1
+                self._cond.notify_all()
+            raise
+
+    async def _checkin(self, db):
+        try:
+            if db.in_transaction:
+                await db.rollback()
+        except Exception:
+            await self._discard(db)
+            return
+        async with self._cond:
+            if not self._closed:
+                self._idle.append(db)
+                self._cond.notify_all()
+                return
+        await self._discard(db)
+
+    async def _discard(self, db):
+        with contextlib.suppress(Exception):
+            await db.close()
+        async with self._cond:
+            self._open -= 1
+            self._stats['closed'] += 1
+            self._cond.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def acquire(self, timeout=None):
+        """
+        Async context manager that checks a connection out and back in,
+        waiting up to timeout seconds for one to become free.
+        """
+        db = await self._checkout(self.timeout if timeout is None
+                                  else timeout)
+        try:
+            yield db
+        finally:
+            # Shielded so a cancelled caller still returns the connection.
+            await asyncio.shield(self._checkin(db))
+
+    def acquire_for(self, sql, timeout=None):
+        """Same as acquire(); the pool serves every kind of statement."""
+        return self.acquire(timeout)
+
+    async def close(self, timeout=None):
+        """
+        Stops handing out connections, closes the idle ones and waits up
+        to timeout seconds (forever when None) for busy ones to be
+        returned and closed. Returns the number still busy, which are
+        closed whenever they come back.
+        """
+        async with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for db in idle:
+            await self._discard(db)
+        async with self._cond:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    self._cond.wait_for(lambda: self._open == 0), timeout)
+            return self._open
+
+    def stats(self):
+        """Returns pool counters plus the current idle and in-use counts."""
+        stats = dict(self._stats)
+        stats['idle'] = len(self._idle)
+        stats['in_use'] = self._open - len(self._idle)
+        return stats
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+        return False
+
+
+class AsyncRouter:
+    """
+    A single writer connection plus a pool of read-only readers for one
+    database.
+
+    Args:
+        database (str): Path of the database file.
+        readers (int): Maximum reader connections.
+        writer_timeout (float): Seconds a write waits for the writer.
+        options: Passed on to both AsyncConnectionPools.
+    """
+
+    def __init__(self, database, readers=4, writer_timeout=30.0,
+                 **options):
+        self.writer = AsyncConnectionPool(database, size=1, min_size=1,
+                                          timeout=writer_timeout, **options)
+        self.readers = AsyncConnectionPool(database, size=readers,
+                                           read_only=True, **options)
+        self.size = readers + 1
+
+    async def open(self):
+        # Readers do not set the journal mode (see pragma_statements).
+        await self.writer.open()
+        await self.readers.open()
+
+    def acquire(self, access='write', timeout=None):
+        """Checks out a reader for 'read' and the writer otherwise."""
+        pool = self.readers if access == 'read' else self.writer
+        return pool.acquire(timeout)
+
+    def acquire_for(self, sql, timeout=None):
+        """Checks out the connection the statement sql should run on."""
+        return self.acquire(access_for(sql), timeout)
+
+    async def close(self, timeout=None):
+        """Drains both pools; returns the connections still busy."""
+        busy = await asyncio.gather(self.readers.close(timeout),
+                                    self.writer.close(timeout))
+        return sum(busy)
+
+    def stats(self):
+        return {'readers': self.readers.stats(),
+                'writer': self.writer.stats()}
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+        return False
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Compares fanning out read queries with a fresh aiosqlite connection per
+query against running them on an AsyncRouter's warm read-only pool.
+
+Usage: ./bench_async_pool.py [queries] [readers]
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import aiosqlite
+
+from async_executor import QueryExecutor
+from async_pool import AsyncRouter
+
+QUERY = "SELECT * FROM users WHERE age > ?"
+
+
+async def connect_per_query(path, n, limit):
+    async def fetch():
+        async with limit:
+            async with aiosqlite.connect(path) as db:
+                return await db.execute_fetchall(QUERY, (40,))
+    return await asyncio.gather(*(fetch() for _ in range(n)))
+
+
+async def main(path, n, readers):
+    start = time.perf_counter()
+    await connect_per_query(path, n, asyncio.Semaphore(readers))
+    elapsed = time.perf_counter() - start
+    print(f"{'connect per query':<20} {elapsed * 1000:>10.1f} ms "
+          f"{n / elapsed:>10.0f} queries/s")
+
+    async with AsyncRouter(path, readers=readers) as router:
+        start = time.perf_counter()
+        await QueryExecutor(router, readers).run([(QUERY, (40,))] * n)
+        elapsed = time.perf_counter() - start
+        stats = router.stats()['readers']
+    print(f"{'pooled readers':<20} {elapsed * 1000:>10.1f} ms "
+          f"{n / elapsed:>10.0f} queries/s  "
+          f"({stats['created']} connections, {stats['waits']} waits)")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, "
+                     "name TEXT, age INTEGER)")
+        conn.executemany("INSERT INTO users (name, age) VALUES (?, ?)",
+                         ((f"User {i}", 18 + i % 60) for i in range(100)))
+        conn.commit()
+        conn.close()
+        asyncio.run(main(path, n, readers))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Compares loading a CSV file the way the setup functions loaded their rows
+(the whole list, then one executemany) with bulk_load and async_bulk_load,
+by time and peak Python memory.
+
+Usage: ./bench_bulk_load.py [rows] [chunk_size]
+"""
+import asyncio
+import csv
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bulk_load import async_bulk_load, bulk_load
+
+SCHEMA = "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, age INT)"
+
+
+def fresh(path):
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    conn.commit()
+    conn.close()
+
+
+def whole_list(path, source):
+    conn = sqlite3.connect(path)
+    with open(source, newline='') as file:
+        reader = csv.reader(file)
+        next(reader)
+        users_data = list(reader)
+    conn.executemany("INSERT INTO users (name, age) VALUES (?, ?)",
+                     users_data)
+    conn.commit()
+    conn.close()
+
+
+def run(label, rows, path, load):
+    # Timed and traced in separate runs: tracing slows the Python-heavy
+    # paths more than the others.
+    fresh(path)
+    start = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - start
+    fresh(path)
+    tracemalloc.start()
+    load()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<16} {elapsed * 1000:>10.1f} ms "
+          f"{rows / elapsed:>12.0f} rows/s "
+          f"{peak / 1024 / 1024:>8.1f} MiB peak")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'users.csv')
+        with open(source, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(('name', 'age'))
+            writer.writerows((f"User {i}", 18 + i % 60)
+                             for i in range(rows))
+        path = os.path.join(tmp, 'bench.db')
+
+        run("whole list", rows, path, lambda: whole_list(path, source))
+        run("bulk_load", rows, path, lambda: bulk_load(
+            path, 'users', source, chunk_size=chunk_size, quiet=True))
+        run("async_bulk_load", rows, path, lambda: asyncio.run(async_bulk_load(
+            path, 'users', source, chunk_size=chunk_size, quiet=True)))
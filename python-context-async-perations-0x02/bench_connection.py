@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Compares the cost of entering and leaving a DatabaseConnection block
+with opening and closing a fresh sqlite3 connection each time.
+
+Usage: ./bench_connection.py [iterations]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+DatabaseConnection = __import__('0-databaseconnection').DatabaseConnection
+
+
+def run(label, body, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        body()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed / iterations * 1e6:>10.1f} us/block")
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, age INT)")
+        conn.executemany("INSERT INTO users (age) VALUES (?)",
+                         [(i % 80,) for i in range(1000)])
+        conn.commit()
+        conn.close()
+
+        def unpooled():
+            conn = sqlite3.connect(path)
+            conn.execute("SELECT 1").fetchone()
+            conn.close()
+
+        def pooled():
+            with DatabaseConnection(path) as conn:
+                conn.execute("SELECT 1").fetchone()
+
+        def nested():
+            with DatabaseConnection(path):
+                with DatabaseConnection(path) as conn:
+                    conn.execute("SELECT 1").fetchone()
+
+        run("connect/close", unpooled, iterations)
+        run("DatabaseConnection", pooled, iterations)
+        run("nested DatabaseConnection", nested, iterations)
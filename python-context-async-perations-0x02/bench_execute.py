@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Compares time and peak Python memory of reading a large table through
+ExecuteQuery with fetchall against its lazy row and column batch modes.
+
+Usage: ./bench_execute.py [rows] [arraysize]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ExecuteQuery = __import__('1-execute').ExecuteQuery
+
+
+def run(label, path, mode, arraysize):
+    tracemalloc.start()
+    start = time.perf_counter()
+    total = 0
+    with ExecuteQuery("SELECT * FROM users", mode=mode, arraysize=arraysize,
+                      database=path) as results:
+        if mode == 'columns':
+            for batch in results:
+                total += sum(batch['age'])
+        else:
+            for row in results:
+                total += row[3]
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<10} {elapsed * 1000:>10.1f} ms "
+          f"{peak / 1024 / 1024:>10.2f} MiB peak  (sum {total})")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    arraysize = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'users.db')
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, "
+                     "name TEXT, email TEXT, age INTEGER)")
+        conn.executemany("INSERT INTO users (name, email, age) "
+                         "VALUES (?, ?, ?)",
+                         ((f"User {i}", f"user{i}@example.com", i % 80)
+                          for i in range(rows)))
+        conn.commit()
+        conn.close()
+
+        for mode in ExecuteQuery.MODES:
+            run(mode, path, mode, arraysize)
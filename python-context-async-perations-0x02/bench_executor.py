@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Sweeps the number of queries and the pool size for QueryExecutor, with a
+read-only workload and a write workload. Reads scale with connections
+until the CPU is busy; writes queue on SQLite's single write lock however
+many connections there are.
+
+Usage: ./bench_executor.py [rows]
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from async_executor import QueryExecutor
+from async_pool import AsyncConnectionPool
+
+READ = ("SELECT COUNT(*), AVG(age) FROM users WHERE age > ?", (40,))
+WRITE = ("UPDATE users SET age = age + 0 WHERE id % 100 = ?", (1,))
+
+
+async def run(path, queries, pool_size):
+    async with AsyncConnectionPool(path, size=pool_size) as pool:
+        executor = QueryExecutor(pool)
+        start = time.perf_counter()
+        results = await executor.run(queries)
+        elapsed = time.perf_counter() - start
+    errors = sum(result.error is not None for result in results)
+    waited = max(result.wait_seconds for result in results)
+    return elapsed, errors, waited
+
+
+async def main(path):
+    print(f"{'workload':<8} {'queries':>8} {'pool':>5} {'ms':>10} "
+          f"{'queries/s':>10} {'max wait ms':>12} {'errors':>7}")
+    for label, query in (('read', READ), ('write', WRITE)):
+        for n in (10, 100, 1000):
+            for pool_size in (1, 2, 4, 8):
+                elapsed, errors, waited = await run(path, [query] * n,
+                                                    pool_size)
+                print(f"{label:<8} {n:>8} {pool_size:>5} "
+                      f"{elapsed * 1000:>10.1f} {n / elapsed:>10.0f} "
+                      f"{waited * 1000:>12.1f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, "
+                     "name TEXT, age INTEGER)")
+        conn.executemany("INSERT INTO users (name, age) VALUES (?, ?)",
+                         ((f"User {i}", i % 80) for i in range(rows)))
+        conn.commit()
+        conn.close()
+        asyncio.run(main(path))
@@ -0,0 +1,246 @@
+"""
+Bulk loading of CSV or JSONL files into SQLite tables.
+
+Rows are streamed from the file and inserted in large executemany chunks
+inside one transaction, with durability PRAGMAs relaxed for the length of
+the load (synchronous=OFF, journal_mode=MEMORY) and restored afterwards.
+Indexes are best built once the data is in, so they can be requested and
+are created after the load.
+
+The point is bounded memory: the file is never held as a list, so a load
+needs about the same few MiB whatever its size, and runs about as fast as
+reading the whole file into a list for one executemany().
+"""
+import asyncio
+import contextlib
+import csv
+import itertools
+import json
+import operator
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+try:
+    import aiosqlite
+except ImportError:
+    aiosqlite = None  # only async_bulk_load needs it
+
+LOAD_PRAGMAS = {'synchronous': 'OFF', 'journal_mode': 'MEMORY'}
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _check_identifier(name):
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"invalid SQL identifier: {name!r}")
+    return name
+
+
+def read_rows(source, columns=None, format=None):
+    """
+    Returns (columns, rows) for a CSV or JSONL file, where rows lazily
+    yields one sequence of values per record in column order.
+
+    CSV files need a header row. JSONL files hold one object per line.
+    columns selects and orders the fields to load; by default every CSV
+    column is loaded, or every key of the first JSON object. A JSON
+    object missing one of the columns loads NULL for it, and keys that
+    are not columns are ignored. format is 'csv' or 'jsonl', taken from
+    the file extension when None.
+    """
+    path = Path(source)
+    format = format or ('jsonl' if path.suffix in ('.jsonl', '.ndjson')
+                        else 'csv')
+    if format not in ('csv', 'jsonl'):
+        raise ValueError(f"unsupported format: {format!r}")
+    file = path.open(newline='' if format == 'csv' else None,
+                     encoding='utf-8')
+    try:
+        if format == 'csv':
+            reader = csv.reader(file)
+            header = next(reader)
+            columns = tuple(columns or header)
+            indexes = [header.index(name) for name in columns]
+            if indexes == list(range(len(header))):
+                rows = reader
+            elif len(indexes) == 1:
+                rows = zip(map(operator.itemgetter(indexes[0]), reader))
+            else:
+                rows = map(operator.itemgetter(*indexes), reader)
+        else:
+            records = (json.loads(line) for line in file if line.strip())
+            first = next(records, None)
+            if first is not None:
+                records = itertools.chain((first,), records)
+            columns = tuple(columns or (first or {}))
+            rows = (tuple(record.get(name) for name in columns)
+                    for record in records)
+    except BaseException:
+        file.close()
+        raise
+    return columns, _closing(rows, file)
+
+
+def _closing(rows, file):
+    with file:
+        yield from rows
+
+
+def _plan(table, columns, indexes):
+    # Returns the INSERT statement and CREATE INDEX statements.
+    table = _check_identifier(table)
+    names = ', '.join(map(_check_identifier, columns))
+    placeholders = ', '.join('?' * len(columns))
+    insert = f"INSERT INTO {table} ({names}) VALUES ({placeholders})"
+    statements = []
+    for index in indexes:
+        index = (index,) if isinstance(index, str) else tuple(index)
+        index_name = '_'.join(('idx', table) + index)
+        statements.append(
+            f"CREATE INDEX IF NOT EXISTS {_check_identifier(index_name)} "
+            f"ON {table} ({', '.join(map(_check_identifier, index))})")
+    return insert, statements
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _report(table, rows, seconds, quiet):
+    stats = {'rows': rows, 'seconds': seconds,
+             'rows_per_second': rows / seconds if seconds else 0.0}
+    if not quiet:
+        print(f"Loaded {rows} rows into {table} in {seconds:.2f}s "
+              f"({stats['rows_per_second']:.0f} rows/s)")
+    return stats
+
+
+def _source_rows(source, columns, format):
+    # A path is read as CSV/JSONL; anything else is an iterable of rows.
+    if isinstance(source, (str, Path)):
+        return read_rows(source, columns, format)
+    if columns is None:
+        raise ValueError("columns are required when loading an iterable")
+    return tuple(columns), source
+
+
+def bulk_load(database, table, source, columns=None, indexes=(),
+              chunk_size=10000, format=None, quiet=False):
+    """
+    Loads rows into an existing table.
+
+    Args:
+        database (str or sqlite3.Connection): Database path, or an open
+            connection; any transaction pending on it is committed first.
+        table (str): Table to insert into.
+        source: Path of a CSV or JSONL file, or an iterable of row tuples.
+        columns (sequence): Columns to fill; required for an iterable.
+        indexes (sequence): Columns, or tuples of columns, to index after
+            the load.
+        chunk_size (int): Rows per executemany call. Rows are passed to
+            executemany as they are read, never collected in a list.
+        format (str): 'csv' or 'jsonl'; see read_rows.
+        quiet (bool): Do not print the throughput line.
+
+    Returns:
+        dict: rows loaded, seconds taken and rows_per_second.
+    """
+    columns, rows = _source_rows(source, columns, format)
+    insert, index_statements = _plan(table, columns, indexes)
+    own = not isinstance(database, sqlite3.Connection)
+    conn = sqlite3.connect(database) if own else database
+    try:
+        conn.commit()
+        saved = {name: conn.execute(f"PRAGMA {name}").fetchone()[0]
+                 for name in LOAD_PRAGMAS}
+        for name, value in LOAD_PRAGMAS.items():
+            # journal_mode cannot leave WAL while others have the file open.
+            with contextlib.suppress(sqlite3.OperationalError):
+                conn.execute(f"PRAGMA {name} = {value}")
+        start = time.perf_counter()
+        loaded = 0
+        try:
+            pending = iter(rows)
+            while True:
+                # A plain INSERT changes one row per parameter set, so
+                # rowcount says how many rows the chunk held.
+                inserted = conn.executemany(
+                    insert, itertools.islice(pending, chunk_size)).rowcount
+                loaded += inserted
+                if inserted < chunk_size:
+                    break
+            for statement in index_statements:
+                conn.execute(statement)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            for name, value in saved.items():
+                with contextlib.suppress(sqlite3.OperationalError):
+                    conn.execute(f"PRAGMA {name} = {value}")
+        return _report(table, loaded, time.perf_counter() - start, quiet)
+    finally:
+        close = getattr(rows, 'close', None)
+        if close is not None:
+            close()
+        if own:
+            conn.close()
+
+
+async def async_bulk_load(database, table, source, columns=None, indexes=(),
+                          chunk_size=10000, format=None, quiet=False):
+    """
+    Same as bulk_load over aiosqlite. database is a path or an open
+    aiosqlite connection; the file is read in a worker thread so the
+    event loop keeps running during the load.
+    """
+    if aiosqlite is None:
+        raise RuntimeError("async_bulk_load needs aiosqlite")
+    columns, rows = _source_rows(source, columns, format)
+    insert, index_statements = _plan(table, columns, indexes)
+    own = not isinstance(database, aiosqlite.Connection)
+    db = await aiosqlite.connect(database) if own else database
+    chunks = _chunks(rows, chunk_size)
+    try:
+        await db.commit()
+        saved = {}
+        for name in LOAD_PRAGMAS:
+            async with db.execute(f"PRAGMA {name}") as cursor:
+                saved[name] = (await cursor.fetchone())[0]
+        for name, value in LOAD_PRAGMAS.items():
+            with contextlib.suppress(sqlite3.OperationalError):
+                await db.execute(f"PRAGMA {name} = {value}")
+        start = time.perf_counter()
+        loaded = 0
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                await db.executemany(insert, chunk)
+                loaded += len(chunk)
+            for statement in index_statements:
+                await db.execute(statement)
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
+        finally:
+            for name, value in saved.items():
+                with contextlib.suppress(sqlite3.OperationalError):
+                    await db.execute(f"PRAGMA {name} = {value}")
+        return _report(table, loaded, time.perf_counter() - start, quiet)
+    finally:
+        close = getattr(rows, 'close', None)
+        if close is not None:
+            close()
+        if own:
+            await db.close()
@@ -0,0 +1,178 @@
+"""
+Connection pools that DatabaseConnection leases from.
+
+get_pool() keeps one ConnectionPool per database file. A DatabaseConnection
+block leases a connection with acquire() and hands it back with release()
+when it exits; nested blocks on the same thread share the outermost
+block's lease, so one thread never holds two connections to the same file.
+A lease returned with a transaction still open is rolled back, so the
+next block starts clean.
+
+access_for() and pragma_statements() are also used by the async pools in
+async_pool.py.
+"""
+import contextlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -16000,        # KiB when negative, so 16 MiB
+}
+
+_READ_VERBS = ('SELECT', 'WITH', 'EXPLAIN', 'VALUES')
+_WRITE_WORDS = re.compile(r'\b(?:INSERT|UPDATE|DELETE|REPLACE)\b',
+                          re.IGNORECASE)
+
+
+def access_for(sql):
+    """Returns 'read' for SELECT-style statements and 'write' otherwise."""
+    words = sql.split(None, 1)
+    if (words and words[0].upper() in _READ_VERBS
+            and not _WRITE_WORDS.search(sql)):
+        return 'read'
+    return 'write'
+
+
+def pragma_statements(pragmas, read_only=False):
+    """
+    Returns the PRAGMA statements that set up a new connection. The
+    journal mode is a property of the database file, so it is left to
+    read-write connections: a read-only one cannot change it, and a
+    database must be opened read-write once before WAL applies to readers.
+    """
+    return [f"PRAGMA {name} = {value}" for name, value in pragmas.items()
+            if not (read_only and name == 'journal_mode')]
+
+
+class ConnectionPool:
+    """
+    Pool of connections to one SQLite database.
+
+    Args:
+        database (str): Path of the database file.
+        size (int): Maximum number of open connections.
+        pragmas (dict): PRAGMAs applied to every new connection.
+        timeout (float): Seconds acquire() waits for a free connection
+                         before raising TimeoutError.
+    """
+
+    def __init__(self, database, size=4, pragmas=None, timeout=5.0):
+        if size < 1:
+            raise ValueError("pool size must be at least 1")
+        self.database = database
+        self.size = size
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self.timeout = timeout
+        self._idle = []
+        self._open = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = dict.fromkeys(('created', 'checkouts', 'waits'), 0)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, check_same_thread=False)
+        for statement in pragma_statements(self.pragmas):
+            conn.execute(statement)
+        return conn
+
+    def acquire(self, timeout=None):
+        """
+        Checks out an idle connection, opening one while fewer than size
+        are open and waiting up to timeout seconds otherwise.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if not self._idle and self._open >= self.size:
+                self._stats['waits'] += 1
+            while (not self._closed and not self._idle
+                   and self._open >= self.size):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"no connection to {self.database} "
+                                       f"available after {timeout}s")
+                self._cond.wait(remaining)
+            if self._closed:
+                raise RuntimeError("connection pool is closed")
+            self._stats['checkouts'] += 1
+            if self._idle:
+                return self._idle.pop()
+            self._open += 1
+        try:
+            conn = self._connect()
+        except BaseException:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats['created'] += 1
+        return conn
+
+    def release(self, conn):
+        """Returns a connection to the pool, rolling back open work."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            return
+        with self._cond:
+            if self._closed:
+                conn.close()
+                self._open -= 1
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def close(self):
+        """Closes idle connections; busy ones are closed when released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            with contextlib.suppress(sqlite3.Error):
+                conn.close()
+
+    def stats(self):
+        """Returns pool counters plus the current idle and in-use counts."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._open - len(self._idle)
+            return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(database, **options):
+    """
+    Returns the shared pool for database, creating it with options on
+    first use.
+    """
+    key = os.path.abspath(database)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(database, **options)
+        return pool
+
+
+def close_pool(database):
+    """Closes and forgets the shared pool for database, if there is one."""
+    with _pools_lock:
+        pool = _pools.pop(os.path.abspath(database), None)
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,29 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# The modules under test live next to the numbered exercise files, which
+# are imported by plain name.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pool  # noqa: E402
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """users.db with ten users in a fresh working directory."""
+    monkeypatch.chdir(tmp_path)
+    # Shared pools are per test, like the database file.
+    monkeypatch.setattr(pool, '_pools', {})
+    conn = sqlite3.connect('users.db')
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, "
+                 "name TEXT NOT NULL, age INTEGER)")
+    conn.executemany("INSERT INTO users (name, age) VALUES (?, ?)",
+                     [(f"user{i}", 20 + i) for i in range(10)])
+    conn.commit()
+    conn.close()
+    yield 'users.db'
+    for shared in pool._pools.values():
+        shared.close()
@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+from async_executor import QueryExecutor
+from async_pool import AsyncConnectionPool
+
+# Counts forever, until the statement is interrupted.
+ENDLESS = ("WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n) "
+           "SELECT COUNT(*) FROM n")
+# Counts for a few tens of milliseconds.
+BUSY = ("WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n "
+        "WHERE x < 200000) SELECT COUNT(*) FROM n")
+
+
+def run(database, test, size=1, **options):
+    async def main():
+        pool = AsyncConnectionPool(database, size=size)
+        await pool.open()
+        try:
+            return await test(pool, QueryExecutor(pool, **options))
+        finally:
+            # Bounded, so a query that was never interrupted fails the
+            # test instead of hanging it.
+            assert await pool.close(timeout=5) == 0
+    return asyncio.run(main())
+
+
+def test_timeout_interrupts_and_returns_the_connection(database):
+    async def test(pool, executor):
+        started = time.perf_counter()
+        timed_out, after = await executor.run(
+            [ENDLESS, "SELECT COUNT(*) FROM users"])
+        return timed_out, after, time.perf_counter() - started, pool.stats()
+
+    timed_out, after, elapsed, stats = run(database, test, timeout=0.1)
+    assert isinstance(timed_out.error, TimeoutError)
+    assert timed_out.rows is None
+    # The pool's one connection was freed for the next query.
+    assert after.rows == [(10,)]
+    assert elapsed < 2
+    assert stats['in_use'] == 0
+
+
+def test_cancelling_the_caller_interrupts_the_query(database):
+    async def test(pool, executor):
+        task = asyncio.ensure_future(executor.run([ENDLESS]))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        stats = pool.stats()
+        async with pool.acquire(timeout=1) as db:
+            rows = await asyncio.wait_for(
+                db.execute_fetchall("SELECT COUNT(*) FROM users"), 1)
+        return stats, rows
+
+    stats, rows = run(database, test)
+    assert stats['in_use'] == 0
+    assert rows == [(10,)]
+
+
+def test_queries_beyond_concurrency_wait_their_turn(database):
+    async def test(pool, executor):
+        return await executor.run([BUSY, BUSY, BUSY])
+
+    results = run(database, test, size=4, concurrency=1)
+    assert [result.rows for result in results] == [[(200000,)]] * 3
+    first, *rest = sorted(results, key=lambda result: result.wait_seconds)
+    assert first.wait_seconds < first.seconds
+    for result in rest:
+        assert result.wait_seconds >= first.seconds * 0.9
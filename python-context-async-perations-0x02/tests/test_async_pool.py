@@ -0,0 +1,95 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from async_pool import AsyncConnectionPool, AsyncRouter
+from pool import access_for
+
+
+@pytest.mark.parametrize('sql, access', [
+    ("SELECT * FROM users", 'read'),
+    ("  select 1", 'read'),
+    ("WITH adults AS (SELECT * FROM users) SELECT * FROM adults", 'read'),
+    ("EXPLAIN QUERY PLAN SELECT * FROM users", 'read'),
+    ("VALUES (1)", 'read'),
+    ("INSERT INTO users (name) VALUES ('x')", 'write'),
+    ("UPDATE users SET age = 1", 'write'),
+    ("WITH old AS (SELECT id FROM users) DELETE FROM users", 'write'),
+    ("REPLACE INTO users (id, name) VALUES (1, 'x')", 'write'),
+    ("CREATE TABLE t (x)", 'write'),
+    ("", 'write'),
+])
+def test_access_for_classifies_statements(sql, access):
+    assert access_for(sql) == access
+
+
+def test_acquire_times_out_when_exhausted(database):
+    async def main():
+        async with AsyncConnectionPool(database, size=1) as pool:
+            async with pool.acquire():
+                with pytest.raises(TimeoutError):
+                    async with pool.acquire(timeout=0.05):
+                        pass
+            return pool.stats()
+
+    stats = asyncio.run(main())
+    assert (stats['waits'], stats['timeouts'], stats['in_use']) == (1, 1, 0)
+
+
+def test_close_drains_busy_connections(database):
+    async def main():
+        pool = AsyncConnectionPool(database, size=2, min_size=2)
+        await pool.open()
+        busy = asyncio.Event()
+
+        async def query(delay):
+            async with pool.acquire() as db:
+                busy.set()
+                await asyncio.sleep(delay)
+                return await db.execute_fetchall("SELECT COUNT(*) FROM users")
+
+        task = asyncio.ensure_future(query(0.1))
+        await busy.wait()
+        still_busy = await pool.close(timeout=2)
+        with pytest.raises(RuntimeError):
+            async with pool.acquire():
+                pass
+        return await task, still_busy, pool.stats()
+
+    rows, still_busy, stats = asyncio.run(main())
+    # The in-flight query finished before its connection was closed.
+    assert rows == [(10,)]
+    assert still_busy == 0
+    assert (stats['closed'], stats['idle'], stats['in_use']) == (2, 0, 0)
+
+
+def test_close_timeout_reports_connections_still_busy(database):
+    async def main():
+        pool = AsyncConnectionPool(database, size=1)
+        async with pool.acquire():
+            still_busy = await pool.close(timeout=0.05)
+        return still_busy, pool.stats()
+
+    still_busy, stats = asyncio.run(main())
+    assert still_busy == 1
+    # Returned after close, so it was closed instead of kept idle.
+    assert (stats['closed'], stats['in_use']) == (1, 0)
+
+
+def test_router_sends_writes_to_the_writer_only(database):
+    async def main():
+        async with AsyncRouter(database, readers=2) as router:
+            async with router.acquire_for("SELECT * FROM users") as db:
+                with pytest.raises(sqlite3.OperationalError,
+                                   match='readonly'):
+                    await db.execute("DELETE FROM users")
+            sql = "UPDATE users SET age = 1"
+            async with router.acquire_for(sql) as db:
+                await db.execute(sql)
+                await db.commit()
+            return router.stats()
+
+    stats = asyncio.run(main())
+    assert stats['readers']['checkouts'] == 1
+    assert stats['writer']['checkouts'] == 1
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+from bulk_load import async_bulk_load, bulk_load
+
+COLUMNS = ('name', 'age')
+
+
+@pytest.fixture
+def conn(database):
+    conn = sqlite3.connect(database)
+    conn.execute("DELETE FROM users")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def pragmas(conn):
+    return {name: conn.execute(f"PRAGMA {name}").fetchone()[0]
+            for name in ('synchronous', 'journal_mode')}
+
+
+def users(conn):
+    return conn.execute("SELECT name, age FROM users ORDER BY id").fetchall()
+
+
+@pytest.mark.parametrize('count', [0, 3, 4, 9])
+def test_loads_every_row_across_chunks(conn, count):
+    rows = [(f"user{i}", i) for i in range(count)]
+    stats = bulk_load(conn, 'users', iter(rows), COLUMNS, chunk_size=3,
+                      quiet=True)
+    assert stats['rows'] == count
+    assert users(conn) == rows
+
+
+def test_pragmas_are_restored_after_the_load(conn):
+    conn.execute("PRAGMA journal_mode = WAL")
+    before = pragmas(conn)
+    bulk_load(conn, 'users', [('a', 1)], COLUMNS, quiet=True)
+    assert pragmas(conn) == before
+
+
+def test_failed_load_rolls_back_and_restores_pragmas(conn):
+    before = pragmas(conn)
+
+    def rows():
+        yield ('a', 1)
+        raise ValueError("bad record")
+
+    with pytest.raises(ValueError):
+        bulk_load(conn, 'users', rows(), COLUMNS, indexes=('age',),
+                  quiet=True)
+    assert pragmas(conn) == before
+    assert users(conn) == []
+    assert conn.execute("SELECT name FROM sqlite_master "
+                        "WHERE type = 'index'").fetchall() == []
+
+
+def test_indexes_are_built_after_the_rows_are_in(conn):
+    statements = []
+    conn.set_trace_callback(statements.append)
+    bulk_load(conn, 'users', [('a', 1), ('b', 2)], COLUMNS,
+              indexes=('age', ('name', 'age')), quiet=True)
+    conn.set_trace_callback(None)
+    inserts = [i for i, sql in enumerate(statements)
+               if sql.startswith('INSERT')]
+    creates = [i for i, sql in enumerate(statements)
+               if sql.startswith('CREATE INDEX')]
+    assert len(creates) == 2 and max(inserts) < min(creates)
+    assert {name for name, in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index'")} == {
+        'idx_users_age', 'idx_users_name_age'}
+
+
+def test_csv_columns_are_selected_by_header(conn, tmp_path):
+    source = tmp_path / 'users.csv'
+    source.write_text("id,age,name\n1,30,a\n2,31,b\n")
+    bulk_load(conn, 'users', str(source), columns=COLUMNS, quiet=True)
+    assert users(conn) == [('a', 30), ('b', 31)]
+
+
+def test_jsonl_columns_come_from_the_first_object(conn, tmp_path):
+    source = tmp_path / 'users.jsonl'
+    records = [{'name': 'a', 'age': 1},
+               {'name': 'b'},
+               {'age': 3, 'name': 'c', 'email': 'c@example.com'}]
+    source.write_text("".join(json.dumps(record) + "\n"
+                              for record in records) + "\n")
+    bulk_load(conn, 'users', str(source), quiet=True)
+    # Missing keys load NULL; keys that are not columns are ignored.
+    assert users(conn) == [('a', 1), ('b', None), ('c', 3)]
+
+
+def test_jsonl_columns_can_be_chosen(conn, tmp_path):
+    source = tmp_path / 'users.jsonl'
+    source.write_text('{"age": 1, "name": "a", "email": "x"}\n')
+    bulk_load(conn, 'users', str(source), columns=('name',), quiet=True)
+    assert users(conn) == [('a', None)]
+
+
+def test_async_load_matches(database, conn, tmp_path):
+    source = tmp_path / 'users.csv'
+    source.write_text("name,age\n" + "".join(f"user{i},{i}\n"
+                                             for i in range(7)))
+    stats = asyncio.run(async_bulk_load(database, 'users', str(source),
+                                        chunk_size=3, quiet=True))
+    assert stats['rows'] == 7
+    assert users(conn) == [(f"user{i}", i) for i in range(7)]
@@ -0,0 +1,55 @@
+import importlib
+import threading
+
+import pytest
+
+DatabaseConnection = importlib.import_module(
+    '0-databaseconnection').DatabaseConnection
+
+
+def count(conn):
+    return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+
+def test_nested_blocks_share_one_connection(database):
+    with DatabaseConnection(database) as outer:
+        with DatabaseConnection(database) as inner:
+            assert inner is outer
+            assert outer.execute("SELECT 1").fetchone() == (1,)
+        # Leaving the inner block keeps the outer lease.
+        assert DatabaseConnection(database).pool.stats()['in_use'] == 1
+    pool = DatabaseConnection(database).pool
+    assert pool.stats()['in_use'] == 0
+    assert pool.stats()['checkouts'] == 1
+
+
+def test_threads_get_their_own_connection(database):
+    seen = []
+    with DatabaseConnection(database) as conn:
+        def other():
+            with DatabaseConnection(database) as theirs:
+                seen.append(theirs)
+        thread = threading.Thread(target=other)
+        thread.start()
+        thread.join(5)
+    assert seen and seen[0] is not conn
+
+
+def test_exception_rolls_back_uncommitted_work(database):
+    with pytest.raises(RuntimeError):
+        with DatabaseConnection(database) as conn:
+            conn.execute("INSERT INTO users (name, age) VALUES ('x', 1)")
+            with DatabaseConnection(database) as inner:
+                inner.execute("DELETE FROM users")
+            raise RuntimeError("abort")
+    with DatabaseConnection(database) as conn:
+        assert count(conn) == 10
+        assert not conn.in_transaction
+
+
+def test_committed_work_survives_release(database):
+    with DatabaseConnection(database) as conn:
+        conn.execute("INSERT INTO users (name, age) VALUES ('x', 1)")
+        conn.commit()
+    with DatabaseConnection(database) as conn:
+        assert count(conn) == 11
@@ -1,34 +1,63 @@
 import sqlite3
 import functools
+import sys
 from datetime import datetime  # Import datetime as required by the checker
+from time import perf_counter
 
-def log_queries(func):
+from query_log import default_log
+from streaming import RowStream, stream_rows, streaming
+
+def log_queries(func=None, *, log=None, sample_rate=None,
+                slow_threshold=None):
     """
-    Decorator that logs the SQL query with a timestamp
-    before executing it.
-    It assumes the query is the first argument passed to the
-    decorated function.
+    Decorator that records each SQL query in a structured query log.
+
+    It assumes the query is the first argument passed to the decorated
+    function (or the 'query' keyword) and the bound parameters, if any,
+    the second (or 'params'). Each call records the query fingerprint,
+    redacted parameters, duration, rows returned and caller into the
+    QueryLog, which writes JSON lines from a background thread. Usable
+    bare (@log_queries) or with options (@log_queries(sample_rate=0.1));
+    sample_rate and slow_threshold override the log's own settings for
+    this function only. Slow queries and failures are always recorded.
+    Streaming results are recorded when the stream is closed, with the
+    time until then and the rows actually read.
     """
+    if func is None:
+        return functools.partial(log_queries, log=log,
+                                 sample_rate=sample_rate,
+                                 slow_threshold=slow_threshold)
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # Try to find the query in args or kwargs
-        query = None
-        if args:
-            query = args[0]  # Assuming query is the first positional arg
-        elif 'query' in kwargs:
-            query = kwargs['query']
-
-        # Get the current timestamp
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-        if query:
-            # Log the query with the timestamp
-            print(f"[{timestamp}] Executing Query: {query}")
-        else:
-            print(f"[{timestamp}] Could not determine query to log for {func.__name__}.")
+        query_log = log or default_log()
+        query = args[0] if args else kwargs.get('query')
+        params = args[1] if len(args) > 1 else kwargs.get('params')
+        start = perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            seconds = perf_counter() - start
+            frame = sys._getframe(1)
+            query_log.record(query, params, seconds, None,
+                             (frame.f_code, frame.f_lineno),
+                             query_log.is_slow(seconds, slow_threshold),
+                             repr(e), start)
+            raise
+        frame = sys._getframe(1)
+        caller = (frame.f_code, frame.f_lineno)
+
+        def finish(rows):
+            seconds = perf_counter() - start
+            slow = query_log.is_slow(seconds, slow_threshold)
+            if slow or query_log.sampled(sample_rate):
+                query_log.record(query, params, seconds, rows, caller, slow,
+                                 started=start)
 
-        # Execute the original function
-        result = func(*args, **kwargs)
+        if isinstance(result, RowStream):
+            result.add_release(lambda stream: finish(stream.rows_read))
+        else:
+            finish(len(result) if isinstance(result, list) else None)
         return result
     return wrapper
 
@@ -49,6 +78,16 @@ def fetch_all_users(query):
         if conn:
             conn.close()
 
+@log_queries
+@streaming
+def stream_all_users(query):
+    """Yields users matching the query; the connection closes with it."""
+    conn = sqlite3.connect('users.db')
+    try:
+        yield from stream_rows(conn.execute(query))
+    finally:
+        conn.close()
+
 # --- Ensure users.db exists (run setup_db.py first) ---
 
 # Fetch users while logging the query
@@ -1,17 +1,20 @@
-import sqlite3
 import functools
 
+import instrument
+from pool import get_router, read_only
+from streaming import run_with_connection
+
 def with_db_connection(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            return func(conn, *args, **kwargs)
-        finally:
-            conn.close()
+        router = get_router('users.db')
+        return run_with_connection(
+            router.connection_for(func, args, kwargs),
+            lambda conn: func(instrument.wrap(conn), *args, **kwargs))
     return wrapper
 
 @with_db_connection
+@read_only
 def get_user_by_id(conn, user_id):
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
@@ -1,26 +1,39 @@
-import sqlite3
 import functools
 
+import instrument
+from cache import database_path, invalidate_tables, written_tables
+from pool import get_router
+from streaming import run_with_connection
+
 def with_db_connection(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            return func(conn, *args, **kwargs)
-        finally:
-            conn.close()
+        router = get_router('users.db')
+        return run_with_connection(
+            router.connection_for(func, args, kwargs),
+            lambda conn: func(instrument.wrap(conn), *args, **kwargs))
     return wrapper
 
 def transactional(func):
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
+        # Record the statements run so cached reads of the tables they
+        # wrote can be invalidated once the commit succeeds.
+        statements = []
+        conn.set_trace_callback(statements.append)
         try:
             result = func(conn, *args, **kwargs)
             conn.commit()
-            return result
         except Exception as e:
             conn.rollback()
             raise e
+        finally:
+            conn.set_trace_callback(None)
+        tables = frozenset().union(*map(written_tables, statements))
+        invalidate_tables(tables, database_path(conn))
+        return result
+    # Routes the call to the single writer connection.
+    wrapper.db_access = 'write'
     return wrapper
 
 @with_db_connection
@@ -1,37 +1,64 @@
-import time
-import sqlite3
 import functools
+import inspect
+
+import instrument
+from pool import get_router, read_only
+from retry import (RetryPolicy, async_call_with_retry, call_with_retry,
+                   is_transient)
+from streaming import run_with_connection, streaming
 
 def with_db_connection(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            return func(conn, *args, **kwargs)
-        finally:
-            conn.close()
+        router = get_router('users.db')
+        return run_with_connection(
+            router.connection_for(func, args, kwargs),
+            lambda conn: func(instrument.wrap(conn), *args, **kwargs))
     return wrapper
 
-def retry_on_failure(retries=3, delay=2):
+def retry_on_failure(retries=3, delay=2, max_delay=30.0, deadline=None,
+                     retry_on=is_transient, breaker=None):
+    """
+    Retries transient database errors with exponential backoff and full
+    jitter, starting from delay seconds. Other errors are raised at once;
+    when every attempt fails a RetryError chained to the last error is
+    raised. deadline bounds the total time spent, and a shared
+    CircuitBreaker makes calls fail fast while the database is unhealthy.
+    Coroutine functions are retried with asyncio.sleep.
+    """
+    policy = RetryPolicy(retries, delay, max_delay, deadline, retry_on)
+
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await async_call_with_retry(func, args, kwargs,
+                                                   policy, breaker)
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            for attempt in range(retries):
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    print(f"Attempt {attempt + 1} failed: {e}")
-                    time.sleep(delay)
-            raise Exception("All retry attempts failed")
+            return call_with_retry(func, args, kwargs, policy, breaker)
         return wrapper
     return decorator
 
 @with_db_connection
 @retry_on_failure(retries=3, delay=1)
+@read_only
 def fetch_users_with_retry(conn):
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM users")
     return cursor.fetchall()
 
+# Streaming variant: @streaming sits below the retry so a failing execute
+# is retried, while rows, once they are being read, are never fetched
+# twice. The reader connection is held until the stream is closed.
+@with_db_connection
+@retry_on_failure(retries=3, delay=1)
+@read_only
+@streaming
+def stream_users_with_retry(conn):
+    return conn.execute("SELECT * FROM users")
+
 users = fetch_users_with_retry()
 print(users)
@@ -1,28 +1,65 @@
-import sqlite3
 import functools
 
-query_cache = {}
+import instrument
+from cache import QueryCache, SingleFlight, database_path, read_tables
+from pool import get_router
+from streaming import is_stream, run_with_connection
+
+query_cache = QueryCache(max_entries=1024, max_bytes=64 * 1024 * 1024, ttl=300)
+# Concurrent misses on the same key wait for one query instead of each
+# running it.
+query_flights = SingleFlight()
+
+_MISSING = object()
+
+
+def _freeze(value):
+    # Makes bound parameters usable as part of a cache key.
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item))
+                            for key, item in value.items()))
+    return value
 
 def with_db_connection(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            return func(conn, *args, **kwargs)
-        finally:
-            conn.close()
+        router = get_router('users.db')
+        return run_with_connection(
+            router.connection_for(func, args, kwargs),
+            lambda conn: func(instrument.wrap(conn), *args, **kwargs))
     return wrapper
 
 def cache_query(func):
+    # A stream can only be read once, so caching it (or sharing it with
+    # concurrent callers) would hand out partial results.
+    if getattr(func, 'db_stream', False):
+        return func
+
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
-        query = kwargs.get("query") or (args[1] if len(args) > 1 else None)
-        if query in query_cache:
+        query = kwargs.get("query") or (args[0] if args else None)
+        db_path = database_path(conn)
+        key = (db_path, func.__qualname__, _freeze(args), _freeze(kwargs))
+        result = query_cache.get(key, _MISSING)
+        if result is not _MISSING:
             print("Using cached result")
-            return query_cache[query]
-        result = func(conn, *args, **kwargs)
-        query_cache[query] = result
-        return result
+            return result
+
+        def load():
+            tables = read_tables(query) if isinstance(query, str) else ()
+            # Taken before the query, so a write committed while it runs
+            # keeps its possibly stale result out of the cache.
+            version = query_cache.version(tables)
+            result = func(conn, *args, **kwargs)
+            if is_stream(result):
+                raise TypeError(f"{func.__qualname__} returned a stream; "
+                                "mark it @streaming so it is not cached")
+            query_cache.set(key, result, tables=tables, db_path=db_path,
+                            version=version)
+            return result
+        return query_flights.do(key, load)
     return wrapper
 
 @with_db_connection
@@ -0,0 +1,77 @@
+"""
+Commits 2000 single-row updates: one transaction per update, one
+write_batch, and a GroupCommitter fed from 16 threads.
+
+Usage: python3 bench_group_commit.py [updates] [threads]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from group_commit import GroupCommitter, write_batch
+
+UPDATE = "UPDATE users SET email = ? WHERE id = ?"
+
+
+def setup(path, rows=10000):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, "
+                 "email TEXT, age INTEGER)")
+    conn.executemany(
+        "INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+        ((f"user{i}", f"user{i}@example.com", 18 + i % 80)
+         for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def report(label, updates, elapsed):
+    print(f"{label:<28} {elapsed:>8.3f}s {updates / elapsed:>10.0f} updates/s")
+
+
+if __name__ == "__main__":
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'users.db')
+        setup(path)
+        rows = [(f"new{i}@example.com", 1 + i % 10000)
+                for i in range(updates)]
+
+        conn = sqlite3.connect(path)
+        start = time.perf_counter()
+        for params in rows:
+            conn.execute(UPDATE, params)
+            conn.commit()
+        report("commit per update", updates, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with write_batch(conn) as batch:
+            for params in rows:
+                batch.add(UPDATE, params)
+        report("write_batch", updates, time.perf_counter() - start)
+        conn.close()
+
+        committer = GroupCommitter(path, flush_size=256, max_latency=0)
+        chunks = [rows[n::threads] for n in range(threads)]
+
+        def writer(chunk):
+            for params in chunk:
+                committer.execute(UPDATE, params)
+
+        workers = [threading.Thread(target=writer, args=(chunk,))
+                   for chunk in chunks]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        report(f"GroupCommitter ({threads} threads)", updates,
+               time.perf_counter() - start)
+        committer.close()
+        print(committer.stats())
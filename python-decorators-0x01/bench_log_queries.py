@@ -0,0 +1,74 @@
+"""
+Per-call overhead of query logging, in nanoseconds, for a trivial query
+function: undecorated, the old print-per-query decorator and log_queries
+writing to a QueryLog.
+
+Usage: python3 bench_log_queries.py [calls]
+"""
+import contextlib
+import functools
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from query_log import QueryLog
+
+
+def print_log_queries(func):
+    # The decorator as it was before the QueryLog.
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        query = args[0] if args else kwargs.get('query')
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        print(f"[{timestamp}] Executing Query: {query}")
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def query(sql, params):
+    return [(1, 'Alice')]
+
+
+def measure(func, calls):
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+        func("SELECT * FROM users WHERE id = ?", (1,))
+    return (time.perf_counter_ns() - start) / calls
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 0-log_queries runs its demo against ./users.db on import.
+        os.chdir(tmp)
+        sqlite3.connect('users.db').execute(
+            "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)").close()
+        sys.path.insert(0, here)
+        with contextlib.redirect_stdout(io.StringIO()):
+            log_queries = __import__('0-log_queries').log_queries
+
+        log = QueryLog(os.path.join(tmp, 'queries.jsonl'),
+                       capacity=calls, flush_interval=1000)
+        cases = [
+            ("undecorated", query),
+            ("print + strftime", print_log_queries(query)),
+            ("log_queries", log_queries(log=log)(query)),
+            ("log_queries 1% sampled",
+             log_queries(log=log, sample_rate=0.01)(query)),
+        ]
+        baseline = None
+        print(f"{'variant':<24} {'ns/call':>10} {'overhead':>10}")
+        for label, func in cases:
+            with open(os.devnull, 'w') as devnull, \
+                    contextlib.redirect_stdout(devnull):
+                ns = measure(func, calls)
+            baseline = ns if baseline is None else baseline
+            print(f"{label:<24} {ns:>10.0f} {ns - baseline:>10.0f}")
+        log.flush()
+        print(log.stats())
@@ -0,0 +1,71 @@
+"""
+Point lookups per second from 16 threads, with a new connection per call
+versus connections drawn from a ConnectionPool.
+
+Usage: python3 bench_pool.py [calls_per_thread] [threads]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from pool import ConnectionPool
+
+
+def setup(path, rows=10000):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, "
+                 "email TEXT, age INTEGER)")
+    conn.executemany(
+        "INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+        ((f"user{i}", f"user{i}@example.com", 18 + i % 80)
+         for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def run(label, lookup, threads, calls):
+    def worker(offset):
+        for i in range(calls):
+            lookup(1 + (offset * calls + i) % 10000)
+
+    workers = [threading.Thread(target=worker, args=(n,))
+               for n in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {threads * calls / elapsed:>12.0f} calls/s")
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'users.db')
+        setup(path)
+
+        def unpooled(user_id):
+            conn = sqlite3.connect(path)
+            try:
+                conn.execute("SELECT * FROM users WHERE id = ?",
+                             (user_id,)).fetchone()
+            finally:
+                conn.close()
+
+        pool = ConnectionPool(path, min_size=threads, max_size=threads)
+
+        def pooled(user_id):
+            with pool.connection() as conn:
+                conn.execute("SELECT * FROM users WHERE id = ?",
+                             (user_id,)).fetchone()
+
+        run("unpooled", unpooled, threads, calls)
+        run("pooled", pooled, threads, calls)
+        print(pool.stats())
+        pool.close()
@@ -0,0 +1,73 @@
+"""
+Thundering herd: 32 threads request the same cold query at once. Without
+single-flight every thread misses the cache and runs the query; with it
+one query runs and the rest share its result.
+
+Usage: python3 bench_single_flight.py [threads] [rounds]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from cache import QueryCache, SingleFlight
+
+# A deliberately slow aggregate so concurrent misses overlap.
+QUERY = ("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n "
+         "WHERE i < 200000) SELECT COUNT(*), SUM(i) FROM n")
+
+
+def herd(label, threads, rounds, path, single_flight):
+    executions = 0
+    counter_lock = threading.Lock()
+    flights = SingleFlight()
+    elapsed = 0.0
+
+    def run_query():
+        nonlocal executions
+        with counter_lock:
+            executions += 1
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute(QUERY).fetchall()
+        finally:
+            conn.close()
+
+    for round_number in range(rounds):
+        cache = QueryCache()
+        key = (path, QUERY, round_number)
+        barrier = threading.Barrier(threads)
+
+        def request():
+            barrier.wait()
+            result = cache.get(key)
+            if result is None:
+                if single_flight:
+                    result = flights.do(key, run_query)
+                else:
+                    result = run_query()
+                cache.set(key, result)
+
+        workers = [threading.Thread(target=request) for _ in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed += time.perf_counter() - start
+
+    print(f"{label:<20} {executions / rounds:>8.1f} queries/herd "
+          f"{elapsed / rounds * 1000:>8.1f} ms/herd")
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'users.db')
+        sqlite3.connect(path).close()
+        herd("cache only", threads, rounds, path, single_flight=False)
+        herd("cache + single-flight", threads, rounds, path,
+             single_flight=True)
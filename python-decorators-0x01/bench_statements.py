@@ -0,0 +1,69 @@
+"""
+Point lookups by id: a new connection per call (the statement is parsed
+every time) versus a pooled connection that reuses its prepared
+statement, with the pool's prepare/execute timing report.
+
+Usage: python3 bench_statements.py [calls]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from pool import ConnectionPool
+
+LOOKUP = "SELECT id, name, email, age FROM users WHERE id = ?"
+
+
+def setup(path, rows=10000):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, "
+                 "email TEXT, age INTEGER)")
+    conn.executemany(
+        "INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+        ((f"user{i}", f"user{i}@example.com", 18 + i % 80)
+         for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def run(label, lookup, calls):
+    start = time.perf_counter_ns()
+    for i in range(calls):
+        lookup(1 + i % 10000)
+    ns = (time.perf_counter_ns() - start) / calls
+    print(f"{label:<36} {ns:>10.0f} ns/lookup")
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'users.db')
+        setup(path)
+
+        def fresh(user_id):
+            conn = sqlite3.connect(path)
+            try:
+                conn.execute(LOOKUP, (user_id,)).fetchone()
+            finally:
+                conn.close()
+
+        uncached = ConnectionPool(path, cached_statements=0)
+        cached = ConnectionPool(path)
+        tracked = ConnectionPool(path, track_statements=True)
+
+        def pooled(pool):
+            def lookup(user_id):
+                with pool.connection() as conn:
+                    conn.execute(LOOKUP, (user_id,)).fetchone()
+            return lookup
+
+        run("new connection per call", fresh, calls // 10)
+        run("pooled, no statement cache", pooled(uncached), calls)
+        run("pooled, statement cache", pooled(cached), calls)
+        run("pooled, statement cache + tracking", pooled(tracked), calls)
+        print(tracked.statement_stats.report())
+        for pool in (uncached, cached, tracked):
+            pool.close()
@@ -0,0 +1,260 @@
+"""
+Query-result cache used by the cache_query decorator.
+
+Entries are keyed on the database path, the SQL text and its bound
+parameters, evicted in LRU order once either the entry or the byte budget
+is exceeded, and expire after a per-entry TTL. Writes committed through
+`transactional` invalidate every cached entry that read one of the tables
+they wrote to, and a result whose read overlapped such a write is not
+cached at all. SingleFlight collapses concurrent misses on the same key
+into one query.
+"""
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+_MISSING = object()
+
+_READ_TABLES = re.compile(r'\b(?:FROM|JOIN)\s+["`\[]?(\w+)', re.IGNORECASE)
+_WRITE_TABLES = re.compile(
+    r'^\s*(?:INSERT|REPLACE)\s+(?:OR\s+\w+\s+)?INTO\s+["`\[]?(\w+)'
+    r'|^\s*UPDATE\s+(?:OR\s+\w+\s+)?["`\[]?(\w+)'
+    r'|^\s*DELETE\s+FROM\s+["`\[]?(\w+)'
+    r'|^\s*(?:DROP|ALTER|CREATE)\s+TABLE\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?'
+    r'["`\[]?(\w+)',
+    re.IGNORECASE)
+
+# Every live QueryCache, so writes can invalidate all of them.
+_caches = weakref.WeakSet()
+
+
+def read_tables(sql):
+    """Returns the lower-cased names of the tables a query reads."""
+    return frozenset(name.lower() for name in _READ_TABLES.findall(sql))
+
+
+def written_tables(sql):
+    """Returns the lower-cased names of the tables a statement writes."""
+    return frozenset(name.lower() for match in _WRITE_TABLES.findall(sql)
+                     for name in match if name)
+
+
+def database_path(conn):
+    """Returns the file the connection's main database was opened on."""
+    # Pooled connections carry the path; plain sqlite3 connections do not
+    # expose it, so ask SQLite.
+    path = getattr(conn, 'database', None)
+    if path is None:
+        path = conn.execute("PRAGMA database_list").fetchone()[2]
+    return path
+
+
+def estimate_size(value):
+    """Approximate memory footprint of a query result, in bytes."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(estimate_size(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v)
+                    for k, v in value.items())
+    return size
+
+
+def invalidate_tables(tables, db_path=None):
+    """Drops entries that read any of tables from every QueryCache."""
+    for cache in list(_caches):
+        cache.invalidate_tables(tables, db_path)
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache of query results with a TTL and table-level
+    invalidation.
+
+    Args:
+        max_entries (int): Maximum number of cached results.
+        max_bytes (int): Maximum estimated size of all cached results.
+        ttl (float): Default seconds an entry stays valid, None for ever.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024,
+                 ttl=300.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_skips = 0
+        # Per-table count of invalidations, so a result read while one of
+        # its tables was being written can be recognised and not cached.
+        self._versions = {}
+        _caches.add(self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Returns the cached value for key, or default on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None \
+                    and entry[2] <= self._clock():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def version(self, tables):
+        """
+        Returns a token for the invalidation state of tables. Take it
+        before running the query and pass it to set().
+        """
+        with self._lock:
+            return tuple(self._versions.get(table.lower(), 0)
+                         for table in sorted(tables))
+
+    def set(self, key, value, tables=(), ttl=_MISSING, db_path=None,
+            version=None):
+        """
+        Caches value under key. tables are the tables it was read from,
+        used by invalidate_tables(). Values larger than max_bytes are not
+        cached, nor is a value whose tables were invalidated since
+        version(tables) returned version: the read may predate the write.
+        """
+        ttl = self.ttl if ttl is _MISSING else ttl
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        expires_at = None if ttl is None else self._clock() + ttl
+        with self._lock:
+            if version is not None and version != tuple(
+                    self._versions.get(table.lower(), 0)
+                    for table in sorted(tables)):
+                self.stale_skips += 1
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at,
+                                  frozenset(tables), db_path)
+            self._bytes += size
+            while (len(self._entries) > self.max_entries
+                   or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_tables(self, tables, db_path=None):
+        """
+        Drops every entry that read one of tables; restricted to db_path
+        when it is given.
+        """
+        tables = frozenset(table.lower() for table in tables)
+        if not tables:
+            return
+        with self._lock:
+            # Counted per table in every database; a write elsewhere only
+            # costs a skipped set().
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+            stale = [key for key, entry in self._entries.items()
+                     if entry[3] & tables
+                     and (db_path is None or entry[4] in (None, db_path))]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Returns the cache counters and current size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'stale_skips': self.stale_skips,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[1]
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time. Callers that arrive while a
+    call for their key is in flight wait for it and share its result (or
+    its exception). The shared lock is only held to look up the flight,
+    so calls for different keys never wait on each other.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key, func):
+        """Returns func(), or the result of the in-flight call for key."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.executions += 1
+            else:
+                flight.waiters += 1
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def stats(self):
+        with self._lock:
+            return {'executions': self.executions, 'shared': self.shared,
+                    'in_flight': len(self._flights)}
@@ -0,0 +1,249 @@
+"""
+Group commit for small writes.
+
+Committing every update on its own costs an fsync each time. Two ways to
+combine writes into one transaction:
+
+- write_batch(conn) collects the writes issued inside a with block and
+  runs them with executemany() in a single commit on exit.
+- GroupCommitter accepts writes from any thread and commits them from a
+  writer thread in groups of up to flush_size, waiting at most
+  max_latency for a group to fill. Each caller's future resolves only
+  after the transaction holding its write has been committed. Groups are
+  committed on the database's Router writer (see pool.py), so they are
+  serialized with every other write instead of racing it for the lock.
+
+Consecutive writes with the same SQL text share one executemany() call;
+the order of writes is preserved.
+"""
+import contextlib
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from itertools import groupby
+
+from cache import invalidate_tables, written_tables
+from pool import get_router
+
+_STOP = object()
+
+
+def _execute_runs(conn, writes):
+    # writes is a sequence of (sql, params); consecutive equal SQL texts
+    # are sent as one executemany().
+    for sql, run in groupby(writes, key=lambda write: write[0]):
+        conn.executemany(sql, [params for _, params in run])
+
+
+def _invalidate(writes, database):
+    tables = frozenset().union(*(written_tables(sql)
+                                 for sql in {sql for sql, _ in writes}))
+    invalidate_tables(tables, database)
+
+
+class WriteBatch:
+    """Writes collected by write_batch()."""
+
+    def __init__(self):
+        self.writes = []
+
+    def add(self, sql, params=()):
+        self.writes.append((sql, params))
+
+    def __len__(self):
+        return len(self.writes)
+
+
+@contextlib.contextmanager
+def write_batch(conn):
+    """
+    Collects writes with batch.add(sql, params) and commits them all in
+    one transaction when the block exits. Nothing is written if the block
+    raises; if a write fails the whole batch is rolled back.
+    """
+    batch = WriteBatch()
+    yield batch
+    if not batch.writes:
+        return
+    try:
+        _execute_runs(conn, batch.writes)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    _invalidate(batch.writes, getattr(conn, 'database', None))
+
+
+class GroupCommitter:
+    """
+    Writer thread that commits writes submitted from other threads in
+    groups.
+
+    Args:
+        database (str): Path of the database file.
+        flush_size (int): Maximum writes per transaction.
+        max_latency (float): Seconds the writer may wait for more writes
+                             after the first one of a group arrives. With
+                             0 a group is whatever queued up while the
+                             previous commit ran.
+        router (pool.Router): Whose writer commits the groups; the shared
+                              get_router(database) by default.
+
+    The router's writer connection is opened by the constructor at the
+    latest, so a database that cannot be opened fails there. If the writer
+    thread stops for any reason, writes still queued and any submitted
+    later fail instead of waiting forever.
+    """
+
+    def __init__(self, database='users.db', flush_size=256,
+                 max_latency=0.0, router=None):
+        # Absolute, like the pool's, so invalidation matches cached entries.
+        self.database = os.path.abspath(database)
+        self.flush_size = flush_size
+        self.max_latency = max_latency
+        self.router = router or get_router(self.database)
+        self.commits = 0
+        self.writes = 0
+        self.largest_group = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._error = None
+        # Orders submit() against close() so nothing is queued after _STOP.
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name='group-commit', daemon=True)
+        self._thread.start()
+
+    def submit(self, sql, params=()):
+        """Queues a write; the returned Future resolves once committed."""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("GroupCommitter is closed") \
+                    from self._error
+            self._queue.put((sql, params, future))
+        return future
+
+    def execute(self, sql, params=(), timeout=None):
+        """Queues a write and blocks until it has been committed."""
+        return self.submit(sql, params).result(timeout)
+
+    def close(self):
+        """Commits everything already queued and stops the writer."""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(_STOP)
+        self._thread.join()
+
+    def stats(self):
+        return {'writes': self.writes, 'commits': self.commits,
+                'largest_group': self.largest_group,
+                'queued': self._queue.qsize()}
+
+    def _collect(self, first):
+        # Takes whatever is already queued, then waits for more until the
+        # group is full or max_latency has passed since the first write.
+        group = [first]
+        deadline = time.monotonic() + self.max_latency
+        while len(group) < self.flush_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if item is _STOP:
+                return group, True
+            group.append(item)
+        return group, False
+
+    def _run(self):
+        group = []
+        try:
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                group, stopping = self._collect(item)
+                group = [write for write in group
+                         if write[2].set_running_or_notify_cancel()]
+                self._write(group)
+                group = []
+        except BaseException as error:
+            self._error = error
+            raise
+        finally:
+            with self._lock:
+                self._closed = True
+            self._fail_pending(group)
+
+    def _fail_pending(self, group):
+        # Fails the group being committed when the writer died and every
+        # write still queued.
+        error = RuntimeError("GroupCommitter is closed")
+        error.__cause__ = self._error
+        pending = [future for _, _, future in group]
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                pending.append(item[2])
+        for future in pending:
+            if not future.done():
+                if future.running() or future.set_running_or_notify_cancel():
+                    future.set_exception(error)
+
+    def _write(self, group):
+        if not group:
+            return
+        writer = self.router.writer
+        try:
+            conn = writer.acquire()
+        except TimeoutError as error:
+            # Other writers held the connection too long; only this group
+            # fails.
+            for _, _, future in group:
+                future.set_exception(error)
+            return
+        try:
+            self._commit(conn, group)
+        finally:
+            writer.release(conn)
+
+    def _commit(self, conn, group):
+        if not group:
+            return
+        writes = [(sql, params) for sql, params, _ in group]
+        try:
+            _execute_runs(conn, writes)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            # Isolate the failing write(s): retry one transaction each.
+            for sql, params, future in group:
+                try:
+                    conn.execute(sql, params)
+                    conn.commit()
+                except Exception as error:
+                    conn.rollback()
+                    future.set_exception(error)
+                else:
+                    self.commits += 1
+                    future.set_result(None)
+        else:
+            self.commits += 1
+            for _, _, future in group:
+                future.set_result(None)
+        self.writes += len(group)
+        self.largest_group = max(self.largest_group, len(group))
+        _invalidate(writes, self.database)
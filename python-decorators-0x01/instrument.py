@@ -0,0 +1,235 @@
+"""
+Per-phase timing for the decorator stack.
+
+When enabled, the time spent in each phase of a database call (checking
+out a connection, executing, fetching, committing and sleeping between
+retries) is recorded in a histogram per phase and passed to any
+registered listeners. report() renders a text summary and prometheus()
+the Prometheus text exposition format.
+
+While disabled, the hooks cost a global flag check: wrap() returns the
+connection unchanged and no timing is taken.
+"""
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+PHASES = ('connect', 'execute', 'fetch', 'commit', 'retry_wait')
+
+# Upper bounds in seconds, from 10us to 10s.
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+enabled = False
+_listeners = []
+
+
+class Histogram:
+    """Cumulative-friendly bucket counts plus sum and count."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile."""
+        with self._lock:
+            counts, count = list(self.counts), self.count
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),),
+                                       counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+histograms = {phase: Histogram() for phase in PHASES}
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    """Clears every histogram."""
+    for phase in list(histograms):
+        histograms[phase] = Histogram(histograms[phase].buckets)
+
+
+def add_listener(listener):
+    """Calls listener(phase, seconds) for every observation."""
+    _listeners.append(listener)
+
+
+def remove_listener(listener):
+    _listeners.remove(listener)
+
+
+def observe(phase, seconds):
+    """Records seconds spent in phase, if instrumentation is enabled."""
+    if not enabled:
+        return
+    histogram = histograms.get(phase)
+    if histogram is None:
+        histogram = histograms.setdefault(phase, Histogram())
+    histogram.observe(seconds)
+    for listener in _listeners:
+        listener(phase, seconds)
+
+
+class _Proxy:
+    """
+    Forwards attribute reads and writes to the wrapped object, so settings
+    such as arraysize and row_factory reach the real cursor or connection.
+    """
+
+    def __init__(self, target):
+        object.__setattr__(self, '_target', target)
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+
+class _InstrumentedCursor(_Proxy):
+    """
+    Cursor proxy timing execute and fetch calls. Iterating it reads
+    arraysize rows per timed fetchmany(), as lazily as the cursor itself.
+    """
+
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany(self._target.arraysize)
+            if not rows:
+                return
+            yield from rows
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def _timed(self, phase, method, *args):
+        start = perf_counter()
+        try:
+            return method(*args)
+        finally:
+            observe(phase, perf_counter() - start)
+
+    def execute(self, *args):
+        self._timed('execute', self._target.execute, *args)
+        return self
+
+    def executemany(self, *args):
+        self._timed('execute', self._target.executemany, *args)
+        return self
+
+    def fetchone(self):
+        return self._timed('fetch', self._target.fetchone)
+
+    def fetchmany(self, *args):
+        return self._timed('fetch', self._target.fetchmany, *args)
+
+    def fetchall(self):
+        return self._timed('fetch', self._target.fetchall)
+
+
+class _InstrumentedConnection(_Proxy):
+    """Connection proxy timing executes, fetches and commits."""
+
+    def cursor(self, *args):
+        return _InstrumentedCursor(self._target.cursor(*args))
+
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+
+    def executemany(self, *args):
+        return self.cursor().executemany(*args)
+
+    def commit(self):
+        start = perf_counter()
+        try:
+            return self._target.commit()
+        finally:
+            observe('commit', perf_counter() - start)
+
+    # Dunder methods bypass __getattr__, so `with conn:` is forwarded here.
+    def __enter__(self):
+        self._target.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            return self._target.__exit__(exc_type, exc_val, exc_tb)
+        # A clean exit commits.
+        start = perf_counter()
+        try:
+            return self._target.__exit__(None, None, None)
+        finally:
+            observe('commit', perf_counter() - start)
+
+
+def wrap(conn):
+    """Returns conn itself when disabled, an instrumented proxy otherwise."""
+    if not enabled:
+        return conn
+    return _InstrumentedConnection(conn)
+
+
+def report():
+    """Text table of count, total and bucketed p50/p95/p99 per phase."""
+    lines = [f"{'phase':<12} {'count':>8} {'total ms':>10} {'mean ms':>9} "
+             f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"]
+    for phase, histogram in histograms.items():
+        if not histogram.count:
+            continue
+        quantiles = [histogram.quantile(q) * 1000 for q in (0.5, 0.95, 0.99)]
+        lines.append(
+            f"{phase:<12} {histogram.count:>8} {histogram.sum * 1000:>10.2f} "
+            f"{histogram.sum / histogram.count * 1000:>9.3f} "
+            + " ".join(f"{value:>8.3f}" for value in quantiles))
+    return "\n".join(lines)
+
+
+def prometheus(name='db_phase_seconds'):
+    """Histograms in the Prometheus text exposition format."""
+    lines = [f"# HELP {name} Time spent per database call phase.",
+             f"# TYPE {name} histogram"]
+    for phase, histogram in histograms.items():
+        with histogram._lock:
+            counts, total, count = (list(histogram.counts), histogram.sum,
+                                    histogram.count)
+        cumulative = 0
+        for bound, bucket_count in zip(histogram.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{phase="{phase}",le="{bound}"}} '
+                         f'{cumulative}')
+        lines.append(f'{name}_bucket{{phase="{phase}",le="+Inf"}} {count}')
+        lines.append(f'{name}_sum{{phase="{phase}"}} {total}')
+        lines.append(f'{name}_count{{phase="{phase}"}} {count}')
+    return "\n".join(lines) + "\n"
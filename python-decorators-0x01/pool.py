@@ -0,0 +1,323 @@
+"""
+Thread-safe pool of SQLite connections shared by with_db_connection.
+
+Opening a connection costs a file open, schema parse and a cold page
+cache, so connections are kept open and handed out again. Each pooled
+connection is set up once with PRAGMAs, checked before reuse if it sat
+idle for a while, and rolled back on return if a transaction was left
+open, which matches what closing it used to do.
+
+Router splits traffic to one database between a pool of read-only
+connections (WAL readers) and a single writer connection, so long reads
+never hold up writers and writers never hit "database is locked" from
+each other.
+"""
+import contextlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import instrument
+from statements import StatementStats, TrackedConnection
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'cache_size': -16000,        # KiB when negative, so 16 MiB
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection that records the database it was opened on."""
+
+
+class ConnectionPool:
+    """
+    Pool of connections to one SQLite database.
+
+    Args:
+        database (str): Path of the database file.
+        min_size (int): Connections opened up front and kept open.
+        max_size (int): Upper bound on open connections.
+        timeout (float): Seconds acquire() waits for a free connection
+                         before raising TimeoutError.
+        pragmas (dict): PRAGMAs applied to every new connection.
+        check_after (float): Idle seconds after which a connection is
+                             checked with a trivial query before reuse.
+        cached_statements (int): Size of each connection's prepared
+                                 statement cache.
+        track_statements (bool): Time executes on pooled connections and
+                                 report prepare versus execute costs in
+                                 statement_stats (see statements.py).
+        read_only (bool): Open connections with mode=ro; any write through
+                          them fails.
+    """
+
+    def __init__(self, database, min_size=1, max_size=8, timeout=5.0,
+                 pragmas=None, check_after=30.0, cached_statements=256,
+                 track_statements=False, read_only=False):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError("need 0 <= min_size <= max_size, max_size >= 1")
+        self.database = database
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self.check_after = check_after
+        self.cached_statements = cached_statements
+        self.statement_stats = StatementStats() if track_statements else None
+        self.read_only = read_only
+        self._idle = []
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = dict.fromkeys(
+            ('created', 'closed', 'checkouts', 'waits', 'timeouts',
+             'failed_checks'), 0)
+        self._stats['wait_seconds'] = 0.0
+        for _ in range(min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+            self._stats['created'] += 1
+
+    def _connect(self):
+        tracked = self.statement_stats is not None
+        path = os.path.abspath(self.database)
+        target, uri = path, False
+        if self.read_only:
+            target, uri = Path(path).as_uri() + '?mode=ro', True
+        conn = sqlite3.connect(
+            target, uri=uri, check_same_thread=False,
+            cached_statements=self.cached_statements,
+            factory=TrackedConnection if tracked else PooledConnection)
+        conn.database = path
+        for name, value in self.pragmas.items():
+            # The journal mode is a property of the file, set by writers.
+            if self.read_only and name == 'journal_mode':
+                continue
+            conn.execute(f"PRAGMA {name} = {value}")
+        if tracked:
+            conn.track(self.statement_stats, self.cached_statements)
+        return conn
+
+    def _healthy(self, conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            with self._cond:
+                self._stats['failed_checks'] += 1
+            return False
+
+    def _discard(self, conn):
+        with contextlib.suppress(sqlite3.Error):
+            conn.close()
+        with self._cond:
+            self._size -= 1
+            self._stats['closed'] += 1
+            self._cond.notify()
+
+    def acquire(self, timeout=None):
+        """
+        Checks out a connection, opening one if the pool is below max_size
+        and waiting up to timeout seconds otherwise.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("connection pool is closed")
+                if not self._idle and self._size >= self.max_size:
+                    self._stats['waits'] += 1
+                    started = time.monotonic()
+                    while not self._idle and self._size >= self.max_size:
+                        remaining = deadline - time.monotonic()
+                        if self._closed:
+                            raise RuntimeError("connection pool is closed")
+                        if remaining <= 0:
+                            self._stats['timeouts'] += 1
+                            raise TimeoutError(
+                                f"no connection to {self.database} "
+                                f"available after {timeout}s")
+                        self._cond.wait(remaining)
+                    self._stats['wait_seconds'] += time.monotonic() - started
+                if self._idle:
+                    conn, released_at = self._idle.pop()
+                else:
+                    conn, released_at = None, None
+                    self._size += 1
+                self._stats['checkouts'] += 1
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except BaseException:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats['created'] += 1
+                return conn
+            if (time.monotonic() - released_at < self.check_after
+                    or self._healthy(conn)):
+                return conn
+            self._discard(conn)
+
+    def release(self, conn):
+        """Returns a connection to the pool, rolling back open work."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        with self._cond:
+            if self._closed:
+                conn.close()
+                self._size -= 1
+                self._stats['closed'] += 1
+                return
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextlib.contextmanager
+    def connection(self, timeout=None):
+        """Context manager that checks a connection out and back in."""
+        if instrument.enabled:
+            start = time.perf_counter()
+            conn = self.acquire(timeout)
+            instrument.observe('connect', time.perf_counter() - start)
+        else:
+            conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Closes idle connections; busy ones are closed when released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._stats['closed'] += len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            conn.close()
+
+    def stats(self):
+        """Returns pool counters plus the current idle and in-use counts."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._size - len(self._idle)
+            return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(database='users.db', **options):
+    """
+    Returns the shared pool for database, creating it with options on
+    first use.
+    """
+    key = os.path.abspath(database)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(key, **options)
+        return pool
+
+
+_READ_VERBS = ('SELECT', 'WITH', 'EXPLAIN', 'VALUES')
+_WRITE_WORDS = re.compile(r'\b(?:INSERT|UPDATE|DELETE|REPLACE)\b',
+                          re.IGNORECASE)
+
+
+def read_only(func):
+    """Marks a function as only reading, so it is routed to a reader."""
+    func.db_access = 'read'
+    return func
+
+
+def access_for(func, args, kwargs):
+    """
+    Returns 'read' or 'write' for a call of func: its db_access mark if it
+    has one (read_only sets 'read', transactional sets 'write'), otherwise
+    the verb of the SQL passed as 'query' or the first argument. Calls
+    without recognisable SQL are treated as writes.
+    """
+    access = getattr(func, 'db_access', None)
+    if access is not None:
+        return access
+    query = kwargs.get('query') or (args[0] if args else None)
+    if not isinstance(query, str):
+        return 'write'
+    verb = query.lstrip().split(None, 1)[0].upper() if query.strip() else ''
+    if verb in _READ_VERBS and not _WRITE_WORDS.search(query):
+        return 'read'
+    return 'write'
+
+
+class Router:
+    """
+    Read-only reader pool plus a single serialized writer connection for
+    one database.
+
+    Args:
+        database (str): Path of the database file.
+        readers (int): Maximum reader connections, one per CPU by default.
+        writer_timeout (float): Seconds a write waits for the writer.
+        options: Passed on to both ConnectionPools.
+    """
+
+    def __init__(self, database, readers=None, writer_timeout=30.0,
+                 **options):
+        # The writer is opened first so the file is in WAL mode before
+        # any reader attaches.
+        self.writer = ConnectionPool(database, min_size=1, max_size=1,
+                                     timeout=writer_timeout, **options)
+        self.readers = ConnectionPool(database, min_size=0,
+                                      max_size=readers or os.cpu_count() or 4,
+                                      read_only=True, **options)
+
+    def connection(self, access='write'):
+        """Checks out a reader for 'read' and the writer otherwise."""
+        pool = self.readers if access == 'read' else self.writer
+        return pool.connection()
+
+    def connection_for(self, func, args, kwargs):
+        """Checks out the connection a call of func should use."""
+        return self.connection(access_for(func, args, kwargs))
+
+    def stats(self):
+        return {'readers': self.readers.stats(),
+                'writer': self.writer.stats()}
+
+    def close(self):
+        self.readers.close()
+        self.writer.close()
+
+
+_routers = {}
+
+
+def get_router(database='users.db', **options):
+    """
+    Returns the shared Router for database, creating it with options on
+    first use.
+    """
+    # Keyed like get_pool, so every spelling of a path shares one writer.
+    key = os.path.abspath(database)
+    with _pools_lock:
+        router = _routers.get(key)
+        if router is None:
+            router = _routers[key] = Router(key, **options)
+        return router
@@ -0,0 +1,163 @@
+"""
+Structured, low-overhead query log used by log_queries.
+
+The calling thread only appends a tuple of raw values to a bounded deque
+(append and popleft are atomic, so no lock is taken). A background thread
+drains the deque in batches, fingerprints the SQL, redacts the parameters
+and appends JSON lines to the log file. When the buffer is full the
+oldest unflushed records are dropped and counted.
+"""
+import atexit
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Normalises literals and whitespace so similar queries group."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('(?)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def redact(params):
+    """Replaces each parameter value with its type name."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+class QueryLog:
+    """
+    In-memory ring buffer of query records flushed to a JSON lines file.
+
+    Args:
+        path (str): File the records are appended to.
+        capacity (int): Maximum number of records held before flushing.
+        flush_interval (float): Seconds between background flushes.
+        batch_size (int): Records written per file write.
+        sample_rate (float): Fraction of queries recorded (0.0 - 1.0).
+        slow_threshold (float): Queries taking at least this many seconds
+                                are always recorded and flagged as slow.
+        redact_params (bool): Log parameter types instead of values.
+    """
+
+    def __init__(self, path='queries.jsonl', capacity=65536,
+                 flush_interval=1.0, batch_size=1024, sample_rate=1.0,
+                 slow_threshold=None, redact_params=True):
+        self.path = path
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.redact_params = redact_params
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self._buffer = deque(maxlen=capacity)
+        # Converts perf_counter() readings to wall-clock timestamps.
+        self._epoch = time.time() - time.perf_counter()
+        self._wakeup = threading.Event()
+        self._write_lock = threading.Lock()
+        self._thread = None
+
+    def is_slow(self, seconds, slow_threshold=None):
+        """Whether seconds reaches the (overridden) slow-query threshold."""
+        if slow_threshold is None:
+            slow_threshold = self.slow_threshold
+        return slow_threshold is not None and seconds >= slow_threshold
+
+    def sampled(self, sample_rate=None):
+        """Draws against the (overridden) sampling rate."""
+        if sample_rate is None:
+            sample_rate = self.sample_rate
+        return sample_rate >= 1.0 or random.random() < sample_rate
+
+    def record(self, query, params, seconds, rows, caller, slow=False,
+               error=None, started=None):
+        """
+        Buffers one query. Only raw values are stored here; formatting
+        happens on the flush thread. started is the perf_counter() value
+        at which the query began, if the caller already has it.
+        """
+        if len(self._buffer) == self.capacity:
+            self.dropped += 1
+        if started is None:
+            started = time.perf_counter() - seconds
+        self._buffer.append(
+            (started, query, params, seconds, rows, caller, slow, error))
+        self.recorded += 1
+        if self._thread is None:
+            self.start()
+
+    def start(self):
+        """Starts the background flush thread if it is not running."""
+        with self._write_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='query-log-flush', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _format(self, record):
+        started, query, params, seconds, rows, caller, slow, error = record
+        code, lineno = caller if caller else (None, None)
+        entry = {
+            'ts': round(self._epoch + started, 6),
+            'fingerprint': fingerprint(query) if query else None,
+            'params': redact(params) if self.redact_params else params,
+            'ms': round(seconds * 1000, 3),
+            'rows': rows,
+            'caller': (f"{os.path.basename(code.co_filename)}:{lineno} "
+                       f"{code.co_name}") if code else None,
+        }
+        if slow:
+            entry['slow'] = True
+        if error is not None:
+            entry['error'] = error
+        return json.dumps(entry, default=repr)
+
+    def flush(self):
+        """Writes every buffered record to the file."""
+        with self._write_lock:
+            while self._buffer:
+                lines = []
+                while self._buffer and len(lines) < self.batch_size:
+                    lines.append(self._format(self._buffer.popleft()))
+                with open(self.path, 'a') as log_file:
+                    log_file.write("\n".join(lines) + "\n")
+                self.written += len(lines)
+
+    def stats(self):
+        return {'recorded': self.recorded, 'dropped': self.dropped,
+                'written': self.written, 'buffered': len(self._buffer)}
+
+
+_default_log = None
+
+
+def default_log():
+    """Returns the process-wide QueryLog writing to queries.jsonl."""
+    global _default_log
+    if _default_log is None:
+        _default_log = QueryLog()
+    return _default_log
@@ -0,0 +1,217 @@
+"""
+Retry policy and circuit breaker used by retry_on_failure.
+
+Only errors classified as transient are retried, with exponential
+backoff and full jitter (a random delay between 0 and the capped
+exponential step) inside an optional overall deadline. A CircuitBreaker
+shared between calls fails fast while the database keeps failing.
+"""
+import asyncio
+import random
+import sqlite3
+import threading
+import time
+
+import instrument
+
+TRANSIENT_MESSAGES = (
+    'database is locked',
+    'database table is locked',
+    'database is busy',
+    'disk i/o error',
+    'unable to open database file',
+)
+
+
+def is_transient(error):
+    """
+    Whether error is worth retrying: SQLite lock/busy/I/O errors and
+    dropped or timed-out connections. Syntax errors, constraint violations
+    and the like are not.
+    """
+    if isinstance(error, sqlite3.OperationalError):
+        message = str(error).lower()
+        return any(text in message for text in TRANSIENT_MESSAGES)
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+class RetryError(Exception):
+    """Raised when every attempt failed; chained to the last error."""
+
+    def __init__(self, message, attempts, last_error):
+        super().__init__(message)
+        self.attempts = attempts
+        self.last_error = last_error
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the database while the circuit is open."""
+
+
+class RetryPolicy:
+    """
+    Args:
+        retries (int): Maximum number of attempts.
+        base_delay (float): Backoff step for the first retry, in seconds.
+        max_delay (float): Cap on a single backoff step.
+        deadline (float): Overall budget in seconds for all attempts and
+                          waits, or None for no budget.
+        retry_on (callable): Classifies an exception as retryable.
+    """
+
+    def __init__(self, retries=3, base_delay=0.1, max_delay=5.0,
+                 deadline=None, retry_on=is_transient):
+        if retries < 1:
+            raise ValueError("retries must be at least 1")
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.retry_on = retry_on
+
+    def backoff(self, attempt):
+        """Full-jitter delay before retry number attempt (1-based)."""
+        step = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, step)
+
+    def next_delay(self, attempt, error, started):
+        """
+        Returns the delay before the next attempt, or None if error must
+        be raised: it is not retryable, attempts are exhausted or the wait
+        would overrun the deadline.
+        """
+        if not self.retry_on(error) or attempt >= self.retries:
+            return None
+        delay = self.backoff(attempt)
+        if (self.deadline is not None
+                and time.monotonic() - started + delay > self.deadline):
+            return None
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive transient failures and
+    rejects calls for reset_timeout seconds, then lets one trial call
+    through (half-open) and closes again if it succeeds.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def before_call(self):
+        """Raises CircuitOpenError unless a call may go through."""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return
+            if state == 'half-open' and not self._trial:
+                self._trial = True
+                return
+            raise CircuitOpenError("database circuit is open")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_neutral(self):
+        """
+        Settles a call that failed for a reason that says nothing about
+        the database's health, freeing the half-open trial slot.
+        """
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+def _check_circuit(breaker, last_error):
+    if breaker is None:
+        return
+    try:
+        breaker.before_call()
+    except CircuitOpenError as error:
+        raise error from last_error
+
+
+def _failed(policy, breaker, attempt, error, started, name):
+    if breaker is not None:
+        if policy.retry_on(error):
+            breaker.record_failure()
+        else:
+            breaker.record_neutral()
+    delay = policy.next_delay(attempt, error, started)
+    if delay is None and policy.retry_on(error):
+        raise RetryError(f"{name} failed after {attempt} attempt(s): {error}",
+                         attempt, error) from error
+    return delay
+
+
+def call_with_retry(func, args, kwargs, policy, breaker=None):
+    """Calls func under policy, sleeping between attempts."""
+    started = time.monotonic()
+    attempt = 0
+    last_error = None
+    while True:
+        attempt += 1
+        _check_circuit(breaker, last_error)
+        try:
+            result = func(*args, **kwargs)
+        except Exception as error:
+            last_error = error
+            delay = _failed(policy, breaker, attempt, error, started,
+                            func.__name__)
+            if delay is None:
+                raise
+            print(f"Attempt {attempt} failed: {error}")
+            time.sleep(delay)
+            instrument.observe('retry_wait', delay)
+            continue
+        if breaker is not None:
+            breaker.record_success()
+        return result
+
+
+async def async_call_with_retry(func, args, kwargs, policy, breaker=None):
+    """Awaits func under policy without blocking the event loop."""
+    started = time.monotonic()
+    attempt = 0
+    last_error = None
+    while True:
+        attempt += 1
+        _check_circuit(breaker, last_error)
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as error:
+            last_error = error
+            delay = _failed(policy, breaker, attempt, error, started,
+                            func.__name__)
+            if delay is None:
+                raise
+            print(f"Attempt {attempt} failed: {error}")
+            await asyncio.sleep(delay)
+            instrument.observe('retry_wait', delay)
+            continue
+        if breaker is not None:
+            breaker.record_success()
+        return result
@@ -0,0 +1,96 @@
+"""
+Prepared-statement reuse on pooled connections.
+
+sqlite3 prepares each SQL text once per connection and keeps the compiled
+statement in a per-connection LRU (the cached_statements argument of
+connect()), keyed by the SQL text. With a new connection per call every
+query is parsed again; on a pooled connection repeated queries skip it.
+
+TrackedConnection and TrackedCursor time every execute() and split the
+timings into first executions of a SQL text on that connection (prepare
+plus execute) and repeats (execute only), mirroring sqlite3's LRU.
+"""
+import sqlite3
+import threading
+from collections import OrderedDict
+from time import perf_counter_ns
+
+
+class StatementStats:
+    """Prepare versus execute timings, aggregated over connections."""
+
+    def __init__(self):
+        self.prepared = 0
+        self.reused = 0
+        self.prepare_ns = 0
+        self.reuse_ns = 0
+        self._lock = threading.Lock()
+
+    def add(self, first, elapsed_ns):
+        with self._lock:
+            if first:
+                self.prepared += 1
+                self.prepare_ns += elapsed_ns
+            else:
+                self.reused += 1
+                self.reuse_ns += elapsed_ns
+
+    def report(self):
+        """
+        Returns counts, mean first/repeat execute times and the estimated
+        cost of preparing a statement (their difference), in nanoseconds.
+        """
+        with self._lock:
+            first = self.prepare_ns / self.prepared if self.prepared else None
+            repeat = self.reuse_ns / self.reused if self.reused else None
+            return {
+                'prepared': self.prepared,
+                'reused': self.reused,
+                'first_execute_ns': first,
+                'repeat_execute_ns': repeat,
+                'prepare_ns': (first - repeat
+                               if first is not None and repeat is not None
+                               else None),
+            }
+
+
+class TrackedCursor(sqlite3.Cursor):
+    """Cursor whose execute() feeds its connection's statement stats."""
+
+    def execute(self, sql, parameters=()):
+        start = perf_counter_ns()
+        result = super().execute(sql, parameters)
+        self.connection.record_statement(sql, perf_counter_ns() - start)
+        return result
+
+
+class TrackedConnection(sqlite3.Connection):
+    """
+    sqlite3 connection that remembers which SQL texts it has prepared.
+    Pass as factory= to sqlite3.connect() and call track() afterwards.
+    """
+
+    def track(self, stats, capacity):
+        self.statement_stats = stats
+        self._prepared = OrderedDict()
+        self._capacity = capacity
+
+    def cursor(self, factory=TrackedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        # Connection.execute() does not go through cursor().
+        return self.cursor().execute(sql, parameters)
+
+    def record_statement(self, sql, elapsed_ns):
+        stats = getattr(self, 'statement_stats', None)
+        if stats is None:
+            return
+        first = sql not in self._prepared
+        if first:
+            self._prepared[sql] = None
+            if len(self._prepared) > self._capacity:
+                self._prepared.popitem(last=False)
+        else:
+            self._prepared.move_to_end(sql)
+        stats.add(first, elapsed_ns)
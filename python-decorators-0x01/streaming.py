@@ -0,0 +1,126 @@
+"""
+Streaming results for decorator-wrapped queries.
+
+A function marked with @streaming returns its rows lazily instead of as a
+fetchall() list. with_db_connection keeps the pooled connection checked
+out until the stream is exhausted, closed (stream.close() or a with
+block) or garbage collected, and only then returns it to the pool.
+
+Put @streaming innermost, below retry_on_failure: the query is executed
+when the decorated function is called, so errors while executing are
+still retried, but rows are never re-fetched once consumption started.
+cache_query never caches streaming functions.
+"""
+import contextlib
+import functools
+import types
+
+
+class RowStream:
+    """
+    Iterator over rows that runs its release callbacks exactly once, when
+    it is exhausted, closed or collected.
+    """
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._releases = []
+        self.rows_read = 0
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.closed:
+            raise StopIteration
+        try:
+            row = next(self._rows)
+        except BaseException:
+            self.close()
+            raise
+        self.rows_read += 1
+        return row
+
+    def add_release(self, callback):
+        """
+        Runs callback(stream) when the stream is closed, most recently
+        added first. Callbacks get the stream as an argument so they need
+        not reference it, which would keep it alive in a cycle.
+        """
+        if self.closed:
+            callback(self)
+        else:
+            self._releases.append(callback)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            close = getattr(self._rows, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            while self._releases:
+                self._releases.pop()(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def __del__(self):
+        self.close()
+
+
+def is_stream(value):
+    return isinstance(value, (RowStream, types.GeneratorType))
+
+
+def stream_rows(cursor, arraysize=256):
+    """Yields the cursor's rows, fetching arraysize at a time."""
+    while True:
+        rows = cursor.fetchmany(arraysize)
+        if not rows:
+            return
+        yield from rows
+
+
+def streaming(func=None, *, arraysize=256):
+    """
+    Marks func as streaming. func may return a cursor, which is read
+    arraysize rows at a time, or any iterator of rows; the caller gets a
+    RowStream either way.
+    """
+    if func is None:
+        return functools.partial(streaming, arraysize=arraysize)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        result = func(*args, **kwargs)
+        if hasattr(result, 'fetchmany'):
+            result = stream_rows(result, arraysize)
+        return result if isinstance(result, RowStream) else RowStream(result)
+    wrapper.db_stream = True
+    return wrapper
+
+
+def run_with_connection(checkout, call):
+    """
+    Enters the checkout context manager and returns call(conn). If the
+    result is a stream, the connection stays checked out and is released
+    when the stream closes; otherwise it is released before returning.
+    """
+    with contextlib.ExitStack() as stack:
+        conn = stack.enter_context(checkout)
+        result = call(conn)
+        if is_stream(result):
+            stream = result if isinstance(result, RowStream) \
+                else RowStream(result)
+            exits = stack.pop_all()
+            stream.add_release(lambda _: exits.close())
+            return stream
+        return result
@@ -0,0 +1,28 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# The modules under test live next to the numbered exercise files, which
+# are imported by plain name.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pool  # noqa: E402
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """users.db with ten users in a fresh working directory."""
+    monkeypatch.chdir(tmp_path)
+    # Shared routers are per test, like the database file.
+    monkeypatch.setattr(pool, '_routers', {})
+    conn = sqlite3.connect('users.db')
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, age INTEGER)")
+    conn.executemany("INSERT INTO users (id, age) VALUES (?, ?)",
+                     [(i, 20) for i in range(10)])
+    conn.commit()
+    conn.close()
+    yield 'users.db'
+    for router in pool._routers.values():
+        router.close()
@@ -0,0 +1,106 @@
+import threading
+import time
+
+from cache import QueryCache, SingleFlight, invalidate_tables
+
+
+def test_invalidation_drops_entries_reading_the_table():
+    cache = QueryCache()
+    cache.set('users', 1, tables={'users'}, db_path='/db')
+    cache.set('orders', 2, tables={'orders'}, db_path='/db')
+    invalidate_tables({'USERS'}, '/db')
+    assert cache.get('users') is None
+    assert cache.get('orders') == 2
+
+
+def test_read_racing_a_write_is_not_cached():
+    cache = QueryCache()
+    version = cache.version({'users'})
+    # A write commits and invalidates while the read is still running.
+    invalidate_tables({'users'}, '/db')
+    cache.set('users', 'stale', tables={'users'}, db_path='/db',
+              version=version)
+    assert cache.get('users') is None
+    assert cache.stats()['stale_skips'] == 1
+
+
+def test_read_without_intervening_write_is_cached():
+    cache = QueryCache()
+    version = cache.version({'users'})
+    invalidate_tables({'orders'}, '/db')
+    cache.set('users', 'fresh', tables={'users'}, db_path='/db',
+              version=version)
+    assert cache.get('users') == 'fresh'
+
+
+def _concurrent(flight, func, callers=4):
+    # Starts callers threads on one key while func blocks, then lets the
+    # single execution finish. Returns what each caller got or raised.
+    outcomes = []
+    lock = threading.Lock()
+
+    def call():
+        try:
+            outcome = flight.do('key', func)
+        except Exception as error:
+            outcome = error
+        with lock:
+            outcomes.append(outcome)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def _wait_for_waiters(flight, count):
+    # Spins until count callers are parked on the in-flight call.
+    for _ in range(1000):
+        if flight.stats()['shared'] >= count:
+            return
+        time.sleep(0.005)
+    raise AssertionError("callers never joined the flight")
+
+
+def test_single_flight_shares_one_result():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def load():
+        release.wait(5)
+        return ['row']
+
+    threads, outcomes = _concurrent(flight, load)
+    _wait_for_waiters(flight, 3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert outcomes == [['row']] * 4
+    assert flight.stats() == {'executions': 1, 'shared': 3, 'in_flight': 0}
+
+
+def test_single_flight_shares_one_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+    error = ValueError("query failed")
+
+    def load():
+        release.wait(5)
+        raise error
+
+    threads, outcomes = _concurrent(flight, load)
+    _wait_for_waiters(flight, 3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert outcomes == [error] * 4
+    # The failed flight is forgotten, so the next call runs again.
+    assert flight.do('key', lambda: 'retried') == 'retried'
+    assert flight.stats()['executions'] == 2
+
+
+def test_single_flight_does_not_share_across_keys():
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+    assert flight.stats()['shared'] == 0
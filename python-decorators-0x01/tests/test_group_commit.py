@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from cache import QueryCache
+from group_commit import GroupCommitter
+from pool import get_router
+
+
+def ages(database):
+    conn = sqlite3.connect(database)
+    try:
+        return [age for age, in conn.execute(
+            "SELECT age FROM users ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def test_writes_are_committed_when_acknowledged(database):
+    committer = GroupCommitter(database)
+    try:
+        def update(user_id):
+            committer.execute("UPDATE users SET age = ? WHERE id = ?",
+                              (30 + user_id, user_id))
+        threads = [threading.Thread(target=update, args=(i,))
+                   for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert ages(database) == [30 + i for i in range(10)]
+        assert committer.stats()['writes'] == 10
+    finally:
+        committer.close()
+
+
+def test_commit_invalidates_cached_reads(database):
+    cache = QueryCache()
+    key = ('users', 'SELECT * FROM users')
+    cache.set(key, [(1, 20)], tables={'users'},
+              db_path=os.path.abspath(database))
+    committer = GroupCommitter(database)
+    try:
+        committer.execute("UPDATE users SET age = 21 WHERE id = 1")
+    finally:
+        committer.close()
+    assert cache.get(key) is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_failing_write_fails_alone(database):
+    committer = GroupCommitter(database, max_latency=0.05)
+    try:
+        good = committer.submit("UPDATE users SET age = 40 WHERE id = 1")
+        bad = committer.submit("INSERT INTO users (id, age) VALUES (1, 1)")
+        also_good = committer.submit("UPDATE users SET age = 41 WHERE id = 2")
+        assert good.result(5) is None
+        assert also_good.result(5) is None
+        with pytest.raises(sqlite3.IntegrityError):
+            bad.result(5)
+    finally:
+        committer.close()
+    assert ages(database)[1:3] == [40, 41]
+
+
+def test_unopenable_database_fails_in_constructor(tmp_path):
+    with pytest.raises(sqlite3.OperationalError):
+        GroupCommitter(str(tmp_path / 'missing' / 'users.db'))
+
+
+@pytest.mark.filterwarnings(
+    "ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_writer_failure_fails_queued_and_new_writes(database):
+    committer = GroupCommitter(database)
+
+    def broken(conn, group):
+        raise MemoryError("writer died")
+    committer._commit = broken
+    with pytest.raises(RuntimeError) as info:
+        committer.execute("UPDATE users SET age = 1", timeout=5)
+    assert isinstance(info.value.__cause__, MemoryError)
+    committer._thread.join(5)
+    with pytest.raises(RuntimeError):
+        committer.submit("UPDATE users SET age = 2")
+    committer.close()
+
+
+def test_submit_after_close_raises(database):
+    committer = GroupCommitter(database)
+    committer.close()
+    with pytest.raises(RuntimeError):
+        committer.submit("UPDATE users SET age = 1")
+
+
+def test_groups_wait_for_the_router_writer(database):
+    router = get_router(database)
+    committer = GroupCommitter(database)
+    try:
+        assert committer.router is router
+        with router.connection('write'):
+            future = committer.submit("UPDATE users SET age = 50")
+            time.sleep(0.05)
+            assert not future.done()
+        assert future.result(5) is None
+    finally:
+        committer.close()
+    assert set(ages(database)) == {50}
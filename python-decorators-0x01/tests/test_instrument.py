@@ -0,0 +1,70 @@
+import sqlite3
+
+import pytest
+
+import instrument
+
+
+@pytest.fixture
+def conn():
+    instrument.reset()
+    instrument.enable()
+    raw = sqlite3.connect(':memory:')
+    raw.execute("CREATE TABLE users (id INTEGER PRIMARY KEY)")
+    raw.executemany("INSERT INTO users (id) VALUES (?)",
+                    [(i,) for i in range(10)])
+    raw.commit()
+    yield instrument.wrap(raw)
+    instrument.disable()
+    instrument.reset()
+    raw.close()
+
+
+def count(conn):
+    return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+
+def test_with_block_commits_and_is_timed(conn):
+    with conn as inner:
+        inner.execute("INSERT INTO users (id) VALUES (10)")
+    assert not conn.in_transaction
+    assert count(conn) == 11
+    assert instrument.histograms['commit'].count == 1
+
+
+def test_with_block_rolls_back_on_error(conn):
+    with pytest.raises(ValueError):
+        with conn:
+            conn.execute("INSERT INTO users (id) VALUES (10)")
+            raise ValueError
+    assert count(conn) == 10
+
+
+def test_cursor_iterates_lazily_in_arraysize_batches(conn):
+    cursor = conn.cursor()
+    cursor.arraysize = 3
+    cursor.execute("SELECT id FROM users ORDER BY id")
+    rows = iter(cursor)
+    assert next(rows) == (0,)
+    assert instrument.histograms['fetch'].count == 1
+    assert [row for row, in rows] == list(range(1, 10))
+    # Four batches of three, the last one empty.
+    assert instrument.histograms['fetch'].count == 5
+
+
+def test_cursor_next_reads_one_row(conn):
+    cursor = conn.execute("SELECT id FROM users ORDER BY id")
+    assert next(cursor) == (0,)
+    assert cursor.fetchone() == (1,)
+
+
+def test_attributes_are_set_on_the_wrapped_connection(conn):
+    conn.row_factory = sqlite3.Row
+    assert conn.execute("SELECT id FROM users").fetchone()['id'] == 0
+
+
+def test_wrap_is_identity_when_disabled(conn):
+    instrument.disable()
+    raw = sqlite3.connect(':memory:')
+    assert instrument.wrap(raw) is raw
+    raw.close()
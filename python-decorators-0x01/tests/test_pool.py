@@ -0,0 +1,81 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from pool import ConnectionPool
+
+
+def test_acquire_times_out_when_exhausted(database):
+    pool = ConnectionPool(database, min_size=0, max_size=1, timeout=0.05)
+    conn = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    stats = pool.stats()
+    assert (stats['waits'], stats['timeouts'], stats['in_use']) == (1, 1, 1)
+    pool.release(conn)
+    pool.close()
+
+
+def test_release_wakes_a_waiter(database):
+    pool = ConnectionPool(database, min_size=0, max_size=1, timeout=5.0)
+    conn = pool.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    pool.release(conn)
+    waiter.join(5)
+    assert acquired == [conn]
+    assert pool.stats()['created'] == 1
+    pool.release(conn)
+    pool.close()
+
+
+def test_close_fails_waiters_without_counting_a_timeout(database):
+    pool = ConnectionPool(database, min_size=0, max_size=1, timeout=5.0)
+    conn = pool.acquire()
+    errors = []
+
+    def wait():
+        try:
+            pool.acquire()
+        except Exception as error:
+            errors.append(error)
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    while not pool.stats()['waits']:
+        time.sleep(0.005)
+    pool.close()
+    waiter.join(5)
+    assert [type(error) for error in errors] == [RuntimeError]
+    assert pool.stats()['timeouts'] == 0
+    pool.release(conn)
+
+
+def test_release_rolls_back_open_work(database):
+    pool = ConnectionPool(database, min_size=0, max_size=1)
+    conn = pool.acquire()
+    conn.execute("INSERT INTO users (age) VALUES (30)")
+    assert conn.in_transaction
+    pool.release(conn)
+    reused = pool.acquire()
+    assert reused is conn
+    assert not reused.in_transaction
+    assert reused.execute("SELECT COUNT(*) FROM users").fetchone() == (10,)
+    pool.release(reused)
+    pool.close()
+
+
+def test_connection_released_after_close_is_closed(database):
+    pool = ConnectionPool(database, min_size=1, max_size=2)
+    conn = pool.acquire()
+    pool.close()
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    pool.release(conn)
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    stats = pool.stats()
+    assert (stats['idle'], stats['in_use'], stats['closed']) == (0, 0, 1)
@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+
+from retry import (CircuitBreaker, CircuitOpenError, RetryError, RetryPolicy,
+                   call_with_retry)
+
+LOCKED = sqlite3.OperationalError("database is locked")
+
+
+def fail_with(error):
+    def func():
+        raise error
+    return func
+
+
+def ok():
+    return 'ok'
+
+
+def call(func, breaker):
+    return call_with_retry(func, (), {}, RetryPolicy(retries=1), breaker)
+
+
+def elapse(breaker):
+    # Pretends reset_timeout has passed since the circuit opened.
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def test_opens_after_threshold_of_transient_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    for _ in range(2):
+        with pytest.raises(RetryError):
+            call(fail_with(LOCKED), breaker)
+    assert breaker.state == 'open'
+    with pytest.raises(CircuitOpenError):
+        call(ok, breaker)
+
+
+def test_non_transient_errors_do_not_count():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    with pytest.raises(sqlite3.OperationalError):
+        call(fail_with(sqlite3.OperationalError("near x: syntax error")),
+             breaker)
+    assert breaker.state == 'closed'
+
+
+def test_successful_trial_closes_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    with pytest.raises(RetryError):
+        call(fail_with(LOCKED), breaker)
+    elapse(breaker)
+    assert breaker.state == 'half-open'
+    assert call(ok, breaker) == 'ok'
+    assert breaker.state == 'closed'
+
+
+def test_failed_trial_reopens_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    with pytest.raises(RetryError):
+        call(fail_with(LOCKED), breaker)
+    elapse(breaker)
+    with pytest.raises(RetryError):
+        call(fail_with(LOCKED), breaker)
+    assert breaker.state == 'open'
+
+
+def test_only_one_trial_at_a_time():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    with pytest.raises(RetryError):
+        call(fail_with(LOCKED), breaker)
+    elapse(breaker)
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_non_transient_trial_failure_frees_trial_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    with pytest.raises(RetryError):
+        call(fail_with(LOCKED), breaker)
+    elapse(breaker)
+    with pytest.raises(ValueError):
+        call(fail_with(ValueError("bad input")), breaker)
+    assert breaker.state == 'half-open'
+    assert call(ok, breaker) == 'ok'
+    assert breaker.state == 'closed'
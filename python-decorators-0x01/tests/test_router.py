@@ -0,0 +1,88 @@
+import os
+import sqlite3
+
+import pytest
+
+import pool
+from pool import Router, access_for, get_router, read_only
+
+
+def _call(query=None, *args):
+    pass
+
+
+@pytest.mark.parametrize('query, access', [
+    ("SELECT * FROM users", 'read'),
+    ("  select 1", 'read'),
+    ("WITH adults AS (SELECT * FROM users) SELECT * FROM adults", 'read'),
+    ("EXPLAIN QUERY PLAN SELECT * FROM users", 'read'),
+    ("VALUES (1)", 'read'),
+    ("INSERT INTO users (age) VALUES (1)", 'write'),
+    ("UPDATE users SET age = 1", 'write'),
+    ("WITH old AS (SELECT id FROM users) DELETE FROM users", 'write'),
+    ("REPLACE INTO users (id) VALUES (1)", 'write'),
+    ("CREATE TABLE t (x)", 'write'),
+    ("", 'write'),
+])
+def test_access_for_classifies_statements(query, access):
+    assert access_for(_call, (query,), {}) == access
+    assert access_for(_call, (), {'query': query}) == access
+
+
+def test_access_for_prefers_the_function_mark():
+    assert access_for(read_only(lambda: None), (), {}) == 'read'
+    assert access_for(_call, (), {}) == 'write'
+
+
+def test_reads_go_to_read_only_connections(database):
+    router = Router(database, readers=2)
+    try:
+        with router.connection('read') as conn:
+            assert conn.execute("SELECT COUNT(*) FROM users").fetchone()
+            with pytest.raises(sqlite3.OperationalError, match='readonly'):
+                conn.execute("INSERT INTO users (age) VALUES (1)")
+        with router.connection('write') as conn:
+            conn.execute("INSERT INTO users (age) VALUES (1)")
+            conn.commit()
+        assert router.stats()['writer']['checkouts'] == 1
+        assert router.stats()['readers']['checkouts'] == 1
+    finally:
+        router.close()
+
+
+def test_one_router_per_database_file(database):
+    router = get_router(database)
+    assert get_router(f'./{database}') is router
+    assert get_router(os.path.abspath(database)) is router
+
+
+def pragma(conn, name):
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def test_pragmas_apply_to_writer_and_readers(database):
+    router = Router(database, readers=1,
+                    pragmas={'journal_mode': 'WAL', 'cache_size': -2000})
+    try:
+        with router.connection('write') as conn:
+            assert pragma(conn, 'journal_mode') == 'wal'
+            assert pragma(conn, 'cache_size') == -2000
+        with router.connection('read') as conn:
+            # Readers skip journal_mode but see the writer's WAL setting.
+            assert pragma(conn, 'journal_mode') == 'wal'
+            assert pragma(conn, 'cache_size') == -2000
+    finally:
+        router.close()
+
+
+def test_default_pragmas(database):
+    router = Router(database, readers=1)
+    try:
+        for access in ('write', 'read'):
+            with router.connection(access) as conn:
+                for name, value in pool.DEFAULT_PRAGMAS.items():
+                    expected = value.lower() if isinstance(value, str) \
+                        else value
+                    assert pragma(conn, name) == expected
+    finally:
+        router.close()
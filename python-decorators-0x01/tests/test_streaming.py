@@ -0,0 +1,117 @@
+import gc
+import importlib
+import json
+import sqlite3
+
+import pytest
+
+import query_log
+from pool import ConnectionPool
+from query_log import QueryLog
+from streaming import RowStream, run_with_connection, stream_rows, streaming
+
+QUERY = "SELECT id FROM users ORDER BY id"
+
+
+@pytest.fixture
+def pool(database):
+    pool = ConnectionPool(database, min_size=0, max_size=1)
+    yield pool
+    pool.close()
+
+
+def in_use(pool):
+    return pool.stats()['in_use']
+
+
+def open_stream(pool, rows=lambda conn: stream_rows(conn.execute(QUERY), 3)):
+    return run_with_connection(pool.connection(), rows)
+
+
+def test_plain_results_release_before_returning(pool):
+    rows = run_with_connection(pool.connection(),
+                               lambda conn: conn.execute(QUERY).fetchall())
+    assert len(rows) == 10
+    assert in_use(pool) == 0
+
+
+def test_exhausted_stream_releases(pool):
+    stream = open_stream(pool)
+    assert isinstance(stream, RowStream)
+    assert in_use(pool) == 1
+    assert [row for row, in stream] == list(range(10))
+    assert in_use(pool) == 0
+    assert stream.rows_read == 10
+
+
+def test_closed_stream_releases(pool):
+    with open_stream(pool) as stream:
+        next(stream)
+        assert in_use(pool) == 1
+    assert in_use(pool) == 0
+    assert list(stream) == []
+
+
+def test_abandoned_stream_releases_when_collected(pool):
+    stream = open_stream(pool)
+    next(stream)
+    del stream
+    gc.collect()
+    assert in_use(pool) == 0
+
+
+def test_error_mid_stream_releases(pool):
+    def failing(conn):
+        yield from conn.execute(QUERY).fetchmany(2)
+        raise sqlite3.OperationalError("disk I/O error")
+
+    stream = open_stream(pool, failing)
+    with pytest.raises(sqlite3.OperationalError):
+        list(stream)
+    assert stream.closed
+    assert stream.rows_read == 2
+    assert in_use(pool) == 0
+
+
+def test_log_queries_records_a_stream_when_it_closes(database, tmp_path,
+                                                     monkeypatch):
+    # Importing the exercise module runs its demo against users.db.
+    monkeypatch.setattr(query_log, '_default_log',
+                        QueryLog(str(tmp_path / 'demo.jsonl')))
+    log_queries = importlib.import_module('0-log_queries').log_queries
+    log = QueryLog(str(tmp_path / 'queries.jsonl'))
+
+    @log_queries(log=log)
+    @streaming
+    def users(query):
+        yield from range(10)
+
+    stream = users(QUERY)
+    for _ in range(3):
+        next(stream)
+    assert log.recorded == 0
+    stream.close()
+    log.flush()
+    with open(log.path) as log_file:
+        entries = [json.loads(line) for line in log_file]
+    assert [entry['rows'] for entry in entries] == [3]
+
+
+def test_cache_query_never_caches_streams(database):
+    cache_query = importlib.import_module('4-cache_query').cache_query
+
+    @streaming
+    def marked(conn, query):
+        return conn.execute(query)
+
+    @cache_query
+    def unmarked(conn, query):
+        return (row for row in conn.execute(query))
+
+    assert cache_query(marked) is marked
+    conn = sqlite3.connect(database)
+    try:
+        with pytest.raises(TypeError, match='@streaming'):
+            unmarked(conn, QUERY)
+    finally:
+        conn.close()
@@ -1,10 +1,34 @@
 from seed import connect_to_prodev
+from rows import row_factory
 
-def stream_users():
+
+def stream_users(prefetch=1000, row_format='dict'):
+    """
+    Yields user_data rows one by one from an unbuffered cursor.
+
+    Rows are pulled from the server prefetch at a time, so client memory is
+    bounded by the prefetch size rather than by the table size.
+
+    Args:
+        prefetch (int): Number of rows fetched from the server per round trip.
+        row_format (str): Row representation, see rows.ROW_FORMATS.
+    """
     connection = connect_to_prodev()
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM user_data")
-    for row in cursor:
-        yield row
-    cursor.close()
-    connection.close()
+    cursor = connection.cursor(buffered=False)
+    try:
+        cursor.execute("SELECT * FROM user_data")
+        make_row = row_factory(cursor.column_names, row_format)
+        while True:
+            rows = cursor.fetchmany(prefetch)
+            if not rows:
+                break
+            for row in rows:
+                yield make_row(row)
+    finally:
+        if connection.unread_result:
+            # Closing normally would drain the rest of the result set over
+            # the wire, so drop the socket when the caller stopped early.
+            connection.shutdown()
+        else:
+            cursor.close()
+            connection.close()
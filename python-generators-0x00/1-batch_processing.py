@@ -3,11 +3,29 @@
 Module for batch processing of user data.
 """
 
+import functools
+import numbers
+import operator
+import sys
+from itertools import compress, count, repeat
+
 # Assuming 'seed.py' and the 'connect_to_prodev' function are provided
 # and exist in the same directory or are otherwise accessible.
 from seed import connect_to_prodev
+from rows import batch_factory
+from partitioned import partitioned_scan
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Comparisons that give the same result applied to a whole NumPy column as
+# applied one age at a time.
+_ELEMENTWISE = frozenset((operator.gt, operator.ge, operator.lt,
+                          operator.le, operator.eq, operator.ne))
 
-def stream_users_in_batches(batch_size):
+def stream_users_in_batches(batch_size, row_format='dict', checkpoint=None):
     """
     Connects to the prodev database and yields users in batches.
 
@@ -18,32 +36,121 @@ def stream_users_in_batches(batch_size):
 
     Args:
         batch_size (int): The number of user records to fetch per batch.
+        row_format (str): Batch representation, see rows.BATCH_FORMATS.
+                          'columns' yields a rows.ColumnBatch per batch.
+        checkpoint (checkpoint.Checkpoint): Makes the stream resumable. Users
+                          are then read in user_id order starting after the
+                          last batch recorded in the checkpoint, and a batch
+                          is recorded once the next one is requested.
 
     Yields:
         list: A list of user records, where each record is a dictionary
-              representing a user. An empty list is not yielded; iteration
-              stops when no more records are available.
+              representing a user (or the row_format equivalent). An empty
+              list is not yielded; iteration stops when no more records are
+              available.
     """
     connection = None
     cursor = None
+    finished = False
     try:
         connection = connect_to_prodev()
-        # Assuming the cursor should be a dictionary cursor as per your original code
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM user_data")
-        
+        cursor = connection.cursor()
+        if checkpoint is None:
+            cursor.execute("SELECT * FROM user_data")
+        elif checkpoint.last_key is None:
+            cursor.execute("SELECT * FROM user_data ORDER BY user_id")
+        else:
+            cursor.execute(
+                "SELECT * FROM user_data WHERE user_id > %s ORDER BY user_id",
+                (checkpoint.last_key,))
+        make_batch = batch_factory(cursor.column_names, row_format)
+        key_index = list(cursor.column_names).index('user_id')
+
         while True:
             batch = cursor.fetchmany(batch_size)
             if not batch:  # No more records to fetch
                 break
-            yield batch
+            yield make_batch(batch)
+            if checkpoint is not None:
+                checkpoint.advance(batch[-1][key_index])
+        finished = True
     finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            connection.close()
+        # The checkpoint is saved even if releasing the connection fails.
+        try:
+            if connection is not None and connection.unread_result:
+                # The consumer stopped early; closing the cursor would fail
+                # with "Unread result found", so drop the socket as
+                # stream_users does.
+                connection.shutdown()
+            else:
+                if cursor:
+                    cursor.close()
+                if connection:
+                    connection.close()
+        finally:
+            if checkpoint is not None:
+                if finished:
+                    checkpoint.complete()
+                else:
+                    checkpoint.flush()
 
-def batch_processing(batch_size):
+def process_batch(batch, threshold=25, predicate=operator.gt, out=None):
+    """
+    Prints every user in a list-of-dicts batch whose age satisfies
+    predicate(age, threshold), checking one user at a time.
+    """
+    # Iterates over users within the current batch
+    for user in batch:
+        # Ensure 'age' key exists and is convertible to int for safety;
+        # MySQL returns DECIMAL columns as decimal.Decimal
+        if 'age' in user and isinstance(user['age'],
+                                        (numbers.Number, str)):
+            try:
+                if predicate(int(user['age']), threshold):
+                    print(user, file=out)
+            except ValueError:
+                # Handle cases where age might be a non-integer string
+                # Or simply skip if age is not a valid number
+                pass
+
+
+def process_column_batch(batch, threshold=25, predicate=operator.gt,
+                         out=None):
+    """
+    Vectorized counterpart of process_batch for a rows.ColumnBatch.
+
+    predicate is called as predicate(age, threshold) for one age, exactly
+    as in process_batch. The operator module comparisons are instead run
+    once over the whole age column when NumPy is installed, which gives
+    the same result. The matching users are written with a single write()
+    call.
+    """
+    ages = batch['age']
+    if np is not None and predicate in _ELEMENTWISE:
+        mask = predicate(np.frombuffer(ages, dtype=ages.typecode), threshold)
+        indices = np.flatnonzero(mask).tolist()
+    else:
+        indices = list(
+            compress(count(), map(predicate, ages, repeat(threshold))))
+    if not indices:
+        return
+
+    selected = [[column[i] for i in indices]
+                for column in (batch[name] for name in batch.column_names)]
+    template = _row_template(batch.column_names)
+    lines = map(template.format, *selected)
+    (out or sys.stdout).write("\n".join(lines) + "\n")
+
+
+@functools.lru_cache(maxsize=None)
+def _row_template(column_names):
+    # Renders a row the way print() renders the equivalent dict.
+    fields = ", ".join(f"{name!r}: {{!r}}" for name in column_names)
+    return "{{" + fields + "}}"
+
+
+def batch_processing(batch_size, threshold=25, predicate=operator.gt,
+                     vectorized=False, workers=1):
     """
     Processes users in batches, filtering and printing users older than 25.
 
@@ -54,26 +161,27 @@ def batch_processing(batch_size):
     Args:
         batch_size (int): The size of each batch to be fetched and processed.
                           This is passed directly to stream_users_in_batches.
+        threshold (int): The age compared against, 25 by default.
+        predicate (callable): predicate(age, threshold) selects the users to
+                              print; operator.gt by default. It always gets
+                              a single age, whichever mode is used.
+        vectorized (bool): Fetch columnar batches and filter each one with
+                           process_column_batch instead of a per-user loop.
+                           Ages are then printed as plain numbers.
+        workers (int): When greater than 1, read the table with that many
+                       concurrent range scans (see partitioned.py). Users
+                       are then printed in no particular order.
     """
-    # First loop: Iterates over batches yielded by the generator
-    for batch in stream_users_in_batches(batch_size):
-        # Second loop (nested): Iterates over users within the current batch
-        for user in batch:
-            # Ensure 'age' key exists and is convertible to int for safety
-            if 'age' in user and isinstance(user['age'], (int, str)):
-                try:
-                    if int(user['age']) > 25:
-                        print(user)
-                except ValueError:
-                    # Handle cases where age might be a non-integer string
-                    # Or simply skip if age is not a valid number
-                    # For this problem, we'll assume valid integer-like ages
-                    # as per the original problem's apparent data structure.
-                    pass # Or log an error: print(f"Warning: Could not parse age for user {user.get('user_id')}")
-            # The original code did not have an else, assuming 'age' is always present and valid.
-            # If print(user) was what you intended and your data is clean:
-            # if int(user['age']) > 25:
-            #     print(user)
+    row_format = 'columns' if vectorized else 'dict'
+    if workers > 1:
+        batches = partitioned_scan(workers, batch_size=batch_size,
+                                   row_format=row_format)
+    else:
+        batches = stream_users_in_batches(batch_size, row_format=row_format)
+
+    process = process_column_batch if vectorized else process_batch
+    for batch in batches:
+        process(batch, threshold, predicate)
 
 
 # Example usage as provided in your 2-main.py
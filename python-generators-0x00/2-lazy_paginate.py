@@ -1,18 +1,135 @@
-from seed import connect_to_prodev
+from seed import check_identifier, connect_to_prodev
+from rows import batch_factory
+
 
 def paginate_users(page_size, offset):
     connection = connect_to_prodev()
     cursor = connection.cursor(dictionary=True)
-    cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
+    cursor.execute("SELECT * FROM user_data LIMIT %s OFFSET %s",
+                   (page_size, offset))
     rows = cursor.fetchall()
     connection.close()
     return rows
 
-def lazy_pagination(page_size):
-    offset = 0
-    while True:
-        page = paginate_users(page_size, offset)
-        if not page:
-            break
-        yield page
-        offset += page_size
+
+def keyset_queries(key='user_id'):
+    """
+    Returns (order, first_sql, seek_sql) for keyset pagination on key.
+
+    order is the tuple of columns the pages are sorted on. Keys other than
+    user_id need not be unique, so user_id is added as a tiebreaker and
+    rows sharing the last key of a page are not skipped. first_sql takes
+    the page size; seek_sql takes one value per order column, then the
+    page size.
+    """
+    key = check_identifier(key)
+    order = (key,) if key == 'user_id' else (key, 'user_id')
+    columns = ", ".join(order)
+    seek = f"{key} > %s" if len(order) == 1 else f"({columns}) > (%s, %s)"
+    return (order,
+            f"SELECT * FROM user_data ORDER BY {columns} LIMIT %s",
+            f"SELECT * FROM user_data WHERE {seek} "
+            f"ORDER BY {columns} LIMIT %s")
+
+
+def page_position(row, indexes):
+    """
+    The position to resume after row: its key, or a (key, user_id) list
+    when user_id breaks ties. indexes locate the order columns in row.
+    """
+    if len(indexes) == 1:
+        return row[indexes[0]]
+    return [row[index] for index in indexes]
+
+
+def seek_params(position, page_size):
+    """Parameters of a keyset_queries seek_sql resuming after position."""
+    values = position if isinstance(position, (list, tuple)) else [position]
+    return (*values, page_size)
+
+
+def paginate_users_after(page_size, last_key=None, key='user_id'):
+    """
+    Fetches the page of users that follows last_key in key order.
+
+    The server seeks straight to last_key through the index on key instead
+    of scanning and discarding the rows before it, so every page costs the
+    same as the first one. For keys other than user_id, last_key is the
+    [key, user_id] pair of the previous page's last row (see
+    page_position), since the key alone may repeat.
+    """
+    order, first_sql, seek_sql = keyset_queries(key)
+    connection = connect_to_prodev()
+    cursor = connection.cursor(dictionary=True)
+    if last_key is None:
+        cursor.execute(first_sql, (page_size,))
+    else:
+        cursor.execute(seek_sql, seek_params(last_key, page_size))
+    rows = cursor.fetchall()
+    connection.close()
+    return rows
+
+
+def lazy_pagination(page_size, key='user_id', connection=None, pool=None,
+                    row_format='dict', checkpoint=None):
+    """
+    Yields pages of users in key order over a single connection. Keys
+    other than user_id are paged on (key, user_id), see keyset_queries.
+
+    The connection is taken from connection, then pool, and otherwise
+    opened with connect_to_prodev(). Pages after the first reuse one
+    prepared statement. A connection this generator obtained itself is
+    released as soon as the generator finishes, is closed or is garbage
+    collected; a connection passed in by the caller is left open.
+    row_format selects the page representation, see rows.BATCH_FORMATS.
+    With a checkpoint.Checkpoint the walk resumes after the last page it
+    recorded, and each page is recorded once the next one is requested.
+    """
+    order, first_sql, seek_sql = keyset_queries(key)
+    owned = connection is None
+    if owned:
+        connection = (pool.get_connection() if pool is not None
+                      else connect_to_prodev())
+    last_key = checkpoint.last_key if checkpoint is not None else None
+    first_cursor = None
+    seek_cursor = None
+    finished = False
+    try:
+        seek_cursor = connection.cursor(prepared=True)
+        if last_key is None:
+            first_cursor = connection.cursor()
+            first_cursor.execute(first_sql, (page_size,))
+            columns = first_cursor.column_names
+            rows = first_cursor.fetchall()
+        else:
+            seek_cursor.execute(seek_sql, seek_params(last_key, page_size))
+            columns = seek_cursor.column_names
+            rows = seek_cursor.fetchall()
+        indexes = [list(columns).index(name) for name in order]
+        make_page = batch_factory(columns, row_format)
+
+        while rows:
+            yield make_page(rows)
+            position = page_position(rows[-1], indexes)
+            if checkpoint is not None:
+                checkpoint.advance(position)
+            if len(rows) < page_size:
+                break
+            seek_cursor.execute(seek_sql, seek_params(position, page_size))
+            rows = seek_cursor.fetchall()
+        finished = True
+    finally:
+        # The checkpoint is saved even if releasing the connection fails.
+        try:
+            if seek_cursor:
+                seek_cursor.close()
+            if first_cursor:
+                first_cursor.close()
+            if owned:
+                connection.close()
+        finally:
+            if checkpoint is not None:
+                if finished:
+                    checkpoint.complete()
+                else:
+                    checkpoint.flush()
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 
 from seed import connect_to_prodev
+from aggregates import aggregate
+from partitioned import partitioned_scan
 
 def stream_user_ages():
     """
@@ -16,21 +18,30 @@ def stream_user_ages():
     cursor.close()
     connection.close()
 
-def calculate_average_age():
+def calculate_average_age(pushdown=True, workers=1):
     """
-    Calculates the average age using the stream_user_ages generator
-    without loading all ages into memory.
-    """
-    total = 0
-    count = 0
+    Calculates the average age without loading all ages into memory.
 
-    for age in stream_user_ages():
-        total += age
-        count += 1
+    By default the average is computed by the database and only the result
+    is transferred. With pushdown=False the ages are streamed through
+    stream_user_ages and accumulated in a single pass; with workers > 1
+    they are read by that many concurrent range scans instead.
+    """
+    if pushdown:
+        connection = connect_to_prodev()
+        try:
+            stats = aggregate(connection, 'age')
+        finally:
+            connection.close()
+    elif workers > 1:
+        batches = partitioned_scan(workers, columns=('age',),
+                                   row_format='columns')
+        stats = aggregate(age for batch in batches for age in batch['age'])
+    else:
+        stats = aggregate(stream_user_ages())
 
-    if count > 0:
-        average = total / count
-        print(f"Average age of users: {average:.2f}")
+    if stats['count'] > 0:
+        print(f"Average age of users: {stats['mean']:.2f}")
     else:
         print("No user data available.")
 
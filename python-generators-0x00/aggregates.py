@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Streaming aggregates over a column of user_data or any iterable of numbers.
+
+aggregate() pushes the computation into SQL when given a database
+connection, so only one result row crosses the wire. For any other
+iterable it falls back to RunningStats, a single-pass accumulator that
+keeps O(1) state (Welford's algorithm for the variance).
+
+Both paths return the count as an int and every other statistic as a
+float, whatever numeric type the column holds (MySQL returns DECIMAL
+columns as decimal.Decimal). NULLs are skipped, as SQL aggregates do.
+
+Histogram buckets are given as sorted edges [e0, e1, ..., en] and count
+values v with e(i) <= v < e(i+1); values outside [e0, en) are not counted.
+"""
+from bisect import bisect_right
+
+from seed import check_identifier
+
+
+class RunningStats:
+    """
+    Single-pass count, sum, mean, min/max, population variance and
+    histogram over a stream of numbers.
+    """
+
+    def __init__(self, buckets=None):
+        self.buckets = list(buckets) if buckets else []
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.min = None
+        self.max = None
+        self._m2 = 0.0
+        self._bucket_counts = [0] * max(len(self.buckets) - 1, 0)
+
+    def add(self, value):
+        """Adds one value to the running statistics."""
+        if value is None:
+            return
+        value = float(value)
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if self._bucket_counts:
+            index = bisect_right(self.buckets, value) - 1
+            if 0 <= index < len(self._bucket_counts):
+                self._bucket_counts[index] += 1
+
+    def update(self, values):
+        """Adds every value of an iterable."""
+        for value in values:
+            self.add(value)
+        return self
+
+    @property
+    def variance(self):
+        """Population variance, or None when no values were added."""
+        return self._m2 / self.count if self.count else None
+
+    def histogram(self):
+        """Returns {(low, high): count} for each bucket."""
+        return dict(zip(zip(self.buckets, self.buckets[1:]),
+                        self._bucket_counts))
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            # SQL's SUM() over no rows is NULL too.
+            'sum': self.total if self.count else None,
+            'mean': self.mean if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'variance': self.variance,
+            'histogram': self.histogram(),
+        }
+
+
+def sql_aggregates(connection, column, table='user_data', buckets=None):
+    """
+    Computes the same statistics as RunningStats.as_dict() in one SELECT.
+
+    Args:
+        connection: An open database connection.
+        column (str): The numeric column to aggregate.
+        table (str): The table to read from.
+        buckets (sequence): Optional sorted histogram edges.
+
+    Returns:
+        dict: count, sum, mean, min, max, variance and histogram.
+    """
+    column = check_identifier(column)
+    table = check_identifier(table)
+    edges = list(buckets) if buckets else []
+    bucket_sql = "".join(
+        f", SUM({column} >= %s AND {column} < %s)" for _ in edges[1:])
+    params = [edge for pair in zip(edges, edges[1:]) for edge in pair]
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            f"SELECT COUNT({column}), SUM({column}), AVG({column}), "
+            f"MIN({column}), MAX({column}), VAR_POP({column}){bucket_sql} "
+            f"FROM {table}", params)
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+
+    count, total, mean, low, high, variance = row[:6]
+    return {
+        'count': int(count),
+        'sum': total if total is None else float(total),
+        'mean': mean if mean is None else float(mean),
+        'min': low if low is None else float(low),
+        'max': high if high is None else float(high),
+        'variance': variance if variance is None else float(variance),
+        'histogram': dict(zip(zip(edges, edges[1:]),
+                              (int(n or 0) for n in row[6:]))),
+    }
+
+
+def aggregate(source, column='age', table='user_data', buckets=None):
+    """
+    Aggregates column of table when source is a database connection, or
+    the numbers yielded by source otherwise.
+    """
+    if hasattr(source, 'cursor'):
+        return sql_aggregates(source, column, table, buckets)
+    return RunningStats(buckets).update(source).as_dict()
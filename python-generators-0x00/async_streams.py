@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+asyncio counterparts of the user_data generators.
+
+With aiomysql installed the rows are read with a native async driver
+(an unbuffered SSCursor). Otherwise the blocking generators run in a
+worker thread through asyncio.to_thread, so the event loop never blocks.
+
+Either way the fetch of the next batch starts as soon as the current one
+is handed out, so it overlaps with the caller's processing of it.
+Callers that may stop early should iterate inside
+contextlib.aclosing(...), so the connection is released right away.
+Otherwise it is released only when the generator is garbage collected.
+"""
+import asyncio
+import contextlib
+
+from seed import DATABASE, DB_CONFIG
+from rows import ROW_FORMATS, batch_factory
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+_stream_users_in_batches = __import__(
+    '1-batch_processing').stream_users_in_batches
+_paginate = __import__('2-lazy_paginate')
+
+
+def _use_aiomysql(driver):
+    if driver not in ('auto', 'aiomysql', 'thread'):
+        raise ValueError(f"Unknown driver {driver!r}")
+    if driver == 'aiomysql' and aiomysql is None:
+        raise RuntimeError("aiomysql is not installed")
+    return driver != 'thread' and aiomysql is not None
+
+
+async def _prefetched(fetch, prefetch=True):
+    """
+    Yields the results of fetch() until it returns an empty batch. With
+    prefetch, the next fetch() is started before the current batch is
+    yielded.
+    """
+    pending = asyncio.ensure_future(fetch())
+    try:
+        while True:
+            batch = await pending
+            if not batch:
+                break
+            if prefetch:
+                pending = asyncio.ensure_future(fetch())
+                yield batch
+            else:
+                yield batch
+                pending = asyncio.ensure_future(fetch())
+    finally:
+        # Let an in-flight fetch finish so its connection or generator
+        # is no longer in use when the caller's cleanup runs.
+        if not pending.done():
+            await asyncio.wait([pending])
+
+
+async def _thread_batches(generator, prefetch):
+    try:
+        # aclosing: the prefetch must have finished before the generator
+        # is closed, not whenever the async generator gets finalized.
+        async with contextlib.aclosing(_prefetched(
+                lambda: asyncio.to_thread(next, generator, None),
+                prefetch)) as batches:
+            async for batch in batches:
+                yield batch
+    finally:
+        await asyncio.to_thread(generator.close)
+
+
+async def _connect():
+    return await aiomysql.connect(**DB_CONFIG, db=DATABASE)
+
+
+async def _aiomysql_batches(batch_size, row_format, prefetch):
+    connection = await _connect()
+    try:
+        async with connection.cursor(aiomysql.SSCursor) as cursor:
+            await cursor.execute("SELECT * FROM user_data")
+            make_batch = batch_factory(
+                [column[0] for column in cursor.description], row_format)
+
+            async def fetch():
+                return make_batch(await cursor.fetchmany(batch_size))
+
+            async with contextlib.aclosing(
+                    _prefetched(fetch, prefetch)) as batches:
+                async for batch in batches:
+                    yield batch
+    finally:
+        connection.close()
+
+
+async def _aiomysql_pages(page_size, key, row_format, prefetch):
+    order, first_sql, seek_sql = _paginate.keyset_queries(key)
+    connection = await _connect()
+    state = {'last_key': None, 'done': False}
+
+    async def fetch():
+        if state['done']:
+            return []
+        async with connection.cursor() as cursor:
+            if state['last_key'] is None:
+                await cursor.execute(first_sql, (page_size,))
+            else:
+                await cursor.execute(
+                    seek_sql,
+                    _paginate.seek_params(state['last_key'], page_size))
+            columns = [column[0] for column in cursor.description]
+            rows = await cursor.fetchall()
+        if len(rows) < page_size:
+            state['done'] = True
+        if rows:
+            state['last_key'] = _paginate.page_position(
+                rows[-1], [columns.index(name) for name in order])
+        return batch_factory(columns, row_format)(rows)
+
+    try:
+        async with contextlib.aclosing(
+                _prefetched(fetch, prefetch)) as pages:
+            async for page in pages:
+                yield page
+    finally:
+        connection.close()
+
+
+async def async_stream_users_in_batches(batch_size, row_format='dict',
+                                        driver='auto', prefetch=True):
+    """
+    async for counterpart of stream_users_in_batches.
+
+    Args:
+        batch_size (int): The number of user records per batch.
+        row_format (str): Batch representation, see rows.BATCH_FORMATS.
+        driver (str): 'aiomysql', 'thread' or 'auto' (aiomysql if installed).
+        prefetch (bool): Fetch batch N+1 while batch N is being processed.
+    """
+    if _use_aiomysql(driver):
+        batches = _aiomysql_batches(batch_size, row_format, prefetch)
+    else:
+        batches = _thread_batches(
+            _stream_users_in_batches(batch_size, row_format), prefetch)
+    async with contextlib.aclosing(batches):
+        async for batch in batches:
+            yield batch
+
+
+async def async_lazy_pagination(page_size, key='user_id', row_format='dict',
+                                driver='auto', prefetch=True):
+    """
+    async for counterpart of lazy_pagination (keyset pagination on key).
+    Arguments are as for async_stream_users_in_batches.
+    """
+    if _use_aiomysql(driver):
+        pages = _aiomysql_pages(page_size, key, row_format, prefetch)
+    else:
+        pages = _thread_batches(
+            _paginate.lazy_pagination(page_size, key, row_format=row_format),
+            prefetch)
+    async with contextlib.aclosing(pages):
+        async for page in pages:
+            yield page
+
+
+async def async_stream_users(prefetch=1000, row_format='dict',
+                             driver='auto'):
+    """
+    async for counterpart of stream_users. Rows are fetched prefetch at a
+    time, one batch ahead of the caller.
+    """
+    if row_format not in ROW_FORMATS:
+        raise ValueError(f"Unknown row_format {row_format!r}; "
+                         f"expected one of {ROW_FORMATS}")
+    async with contextlib.aclosing(async_stream_users_in_batches(
+            prefetch, row_format, driver)) as batches:
+        async for batch in batches:
+            for row in batch:
+                yield row
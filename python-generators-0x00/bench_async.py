@@ -0,0 +1,42 @@
+#!/usr/bin/python3
+"""
+Shows the gain from prefetching the next batch in the async generators.
+
+Usage: ./bench_async.py [batch_size] [process_ms]
+
+Each batch is "processed" with an asyncio.sleep of process_ms. Without
+prefetch the total is fetch time + processing time; with prefetch the
+fetch of batch N+1 overlaps the processing of batch N.
+"""
+import asyncio
+import sys
+import time
+
+from async_streams import (async_lazy_pagination,
+                           async_stream_users_in_batches)
+
+
+async def consume(batches, process_seconds):
+    start = time.perf_counter()
+    count = 0
+    async for batch in batches:
+        count += len(batch)
+        await asyncio.sleep(process_seconds)
+    return count, time.perf_counter() - start
+
+
+async def main(batch_size, process_seconds):
+    print(f"{'generator':<32} {'prefetch':>8} {'rows':>8} {'seconds':>8}")
+    for name, make in (
+            ('async_stream_users_in_batches', async_stream_users_in_batches),
+            ('async_lazy_pagination', async_lazy_pagination)):
+        for prefetch in (False, True):
+            rows, elapsed = await consume(
+                make(batch_size, prefetch=prefetch), process_seconds)
+            print(f"{name:<32} {str(prefetch):>8} {rows:>8} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    process_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    asyncio.run(main(batch_size, process_ms / 1000))
@@ -0,0 +1,47 @@
+#!/usr/bin/python3
+"""
+Compares the per-user process_batch loop with the vectorized
+process_column_batch filter on synthetic batches.
+
+Usage: ./bench_batch_processing.py [rows] [batch_size]
+"""
+import io
+import sys
+import time
+from decimal import Decimal
+
+from rows import batch_factory
+
+processing = __import__('1-batch_processing')
+
+COLUMNS = ('user_id', 'name', 'email', 'age')
+
+
+def run(label, batches, process, rows):
+    out = io.StringIO()
+    start = time.perf_counter()
+    for batch in batches:
+        process(batch, out=out)
+    elapsed = time.perf_counter() - start
+    matched = out.getvalue().count("\n")
+    print(f"{label:<28} {elapsed * 1000:>10.1f} ms "
+          f"{rows / elapsed:>12.0f} rows/s {matched:>10} matched")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    # mysql-connector returns the DECIMAL age column as Decimal.
+    raw = [(f"id-{i}", f"User {i}", f"user{i}@example.com",
+            Decimal(18 + i % 80)) for i in range(rows)]
+    chunks = [raw[i:i + batch_size] for i in range(0, rows, batch_size)]
+
+    make_dicts = batch_factory(COLUMNS, 'dict')
+    make_columns = batch_factory(COLUMNS, 'columns')
+    dict_batches = [make_dicts(chunk) for chunk in chunks]
+    column_batches = [make_columns(chunk) for chunk in chunks]
+
+    backend = "numpy" if processing.np is not None else "array"
+    run("nested loop", dict_batches, processing.process_batch, rows)
+    run(f"vectorized ({backend})", column_batches,
+        processing.process_column_batch, rows)
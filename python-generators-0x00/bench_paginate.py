@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+"""
+Times individual pages of OFFSET pagination against keyset pagination.
+
+Usage: ./bench_paginate.py [page_size]
+
+Seed user_data with at least 1M rows first (see bench_seed.py). OFFSET
+latency grows with the page number; keyset latency stays flat.
+"""
+import sys
+import time
+
+paginate = __import__('2-lazy_paginate')
+
+
+def time_page(fetch):
+    start = time.perf_counter()
+    fetch()
+    return (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    print(f"{'page':>8} {'offset ms':>10} {'keyset ms':>10}")
+
+    last_key = None
+    page_number = 1
+    next_report = 1
+    while True:
+        if page_number == next_report:
+            next_report *= 10
+            offset = (page_number - 1) * page_size
+            offset_ms = time_page(
+                lambda: paginate.paginate_users(page_size, offset))
+            keyset_ms = time_page(
+                lambda: paginate.paginate_users_after(page_size, last_key))
+            print(f"{page_number:>8} {offset_ms:>10.2f} {keyset_ms:>10.2f}")
+        page = paginate.paginate_users_after(page_size, last_key)
+        if len(page) < page_size:
+            break
+        last_key = page[-1]['user_id']
+        page_number += 1
+
+    seed = __import__('seed')
+    before = dict(seed.connection_stats)
+    pages = sum(1 for _ in paginate.lazy_pagination(page_size))
+    connects = seed.connection_stats['connects'] - before['connects']
+    seconds = seed.connection_stats['seconds'] - before['seconds']
+    print(f"\nlazy_pagination: {pages} pages, {connects} connection(s), "
+          f"{seconds * 1000:.2f} ms connecting")
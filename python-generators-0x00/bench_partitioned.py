@@ -0,0 +1,27 @@
+#!/usr/bin/python3
+"""
+Full-table scan throughput of partitioned_scan for 1, 2, 4 and 8 workers.
+
+Usage: ./bench_partitioned.py [batch_size]
+"""
+import sys
+import time
+
+from partitioned import partitioned_scan
+
+WORKERS = (1, 2, 4, 8)
+
+
+if __name__ == "__main__":
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print(f"{'workers':>8} {'rows':>10} {'seconds':>9} {'rows/s':>12} "
+          f"{'speedup':>8}")
+    baseline = None
+    for workers in WORKERS:
+        start = time.perf_counter()
+        rows = sum(len(batch) for batch in partitioned_scan(
+            workers, batch_size=batch_size, row_format='tuple'))
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {rows:>10} {elapsed:>9.2f} "
+              f"{rows / elapsed:>12.0f} {baseline / elapsed:>7.2f}x")
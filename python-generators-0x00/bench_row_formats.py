@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+"""
+Microbenchmark of the row formats in rows.py: conversion rate and
+retained bytes per row for a synthetic batch of user_data rows.
+
+Usage: ./bench_row_formats.py [rows] [batch_size]
+"""
+import sys
+import time
+import tracemalloc
+import uuid
+from decimal import Decimal
+
+from rows import BATCH_FORMATS, batch_factory
+
+COLUMNS = ('user_id', 'name', 'email', 'age')
+
+
+def raw_rows(count):
+    return [(str(uuid.uuid4()), f"User {i}", f"user{i}@example.com",
+             Decimal(18 + i % 80)) for i in range(count)]
+
+
+def build(make_batch, rows, batch_size):
+    return [make_batch(rows[i:i + batch_size])
+            for i in range(0, len(rows), batch_size)]
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    rows = raw_rows(count)
+
+    print(f"{'format':<12} {'rows/s':>12} {'bytes/row':>10}")
+    for row_format in BATCH_FORMATS:
+        make_batch = batch_factory(COLUMNS, row_format)
+
+        start = time.perf_counter()
+        build(make_batch, rows, batch_size)
+        elapsed = time.perf_counter() - start
+
+        # Only the container overhead is counted; the value objects are
+        # shared with rows, except where a format converts them.
+        tracemalloc.start()
+        batches = build(make_batch, rows, batch_size)
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del batches
+
+        print(f"{row_format:<12} {count / elapsed:>12.0f} "
+              f"{retained / count:>10.1f}")
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""
+Compares the per-row insert_data path with bulk_insert_data on a
+generated CSV file.
+
+Usage: ./bench_seed.py [rows] [batch_size]
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+seed = __import__('seed')
+
+
+def generate_csv(file_path, rows):
+    with open(file_path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(seed.USER_COLUMNS)
+        for i in range(rows):
+            writer.writerow([
+                str(uuid.uuid4()), f"User {i}", f"user{i}@example.com",
+                18 + i % 80,
+            ])
+
+
+def timed(label, rows, load):
+    connection = seed.connect_to_prodev()
+    cursor = connection.cursor()
+    cursor.execute("TRUNCATE TABLE user_data")
+    cursor.close()
+    start = time.perf_counter()
+    load(connection)
+    elapsed = time.perf_counter() - start
+    connection.close()
+    print(f"{label:<24} {elapsed:8.2f}s {rows / elapsed:12.0f} rows/s")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    connection = seed.connect_db()
+    seed.create_database(connection)
+    connection.close()
+    connection = seed.connect_to_prodev()
+    seed.create_table(connection)
+    connection.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, 'user_data.csv')
+        generate_csv(file_path, rows)
+        timed("insert_data", rows,
+              lambda conn: seed.insert_data(conn, file_path))
+        timed(f"bulk_insert_data({batch_size})", rows,
+              lambda conn: seed.bulk_insert_data(conn, file_path, batch_size))
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""
+Measures peak RSS while reading the first N rows of user_data with a
+buffered cursor and with the streaming stream_users generator.
+
+Usage: ./bench_stream_memory.py [prefetch]
+
+Each measurement runs in its own process so peak RSS is not shared.
+"""
+import resource
+import subprocess
+import sys
+from itertools import islice
+
+ROW_COUNTS = (10000, 100000, 1000000)
+
+
+def buffered_users():
+    from seed import connect_to_prodev
+    connection = connect_to_prodev()
+    cursor = connection.cursor(buffered=True, dictionary=True)
+    cursor.execute("SELECT * FROM user_data")
+    for row in cursor:
+        yield row
+    cursor.close()
+    connection.close()
+
+
+def measure(mode, rows, prefetch):
+    if mode == 'buffered':
+        users = buffered_users()
+    else:
+        stream_users = __import__('0-stream_users').stream_users
+        users = stream_users(prefetch=prefetch, row_format=mode)
+    for _ in islice(users, rows):
+        pass
+    users.close()
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == '--child':
+        measure(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+        sys.exit(0)
+
+    prefetch = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    modes = ('buffered', 'dict', 'tuple', 'namedtuple')
+    print(f"{'rows':>10}" + "".join(f"{mode:>14}" for mode in modes)
+          + "   (peak RSS, KiB)")
+    for rows in ROW_COUNTS:
+        line = f"{rows:>10}"
+        for mode in modes:
+            output = subprocess.run(
+                [sys.executable, __file__, '--child', mode, str(rows),
+                 str(prefetch)],
+                capture_output=True, text=True, check=True).stdout
+            line += f"{int(output.split()[-1]):>14}"
+        print(line)
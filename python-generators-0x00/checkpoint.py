@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Checkpoint files for resumable user_data streams.
+
+A stream records the key of the last batch its consumer finished with.
+Progress is only recorded once the consumer asks for the next batch, so
+after a crash every batch is delivered again at least once; `every`
+trades checkpoint writes against the number of batches redone.
+"""
+import decimal
+import json
+import os
+
+
+def _json_default(value):
+    # Keys such as the DECIMAL age come back from MySQL as Decimal; MySQL
+    # compares the string form with the column just the same on resume.
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f"cannot record {type(value).__name__} key {value!r}")
+
+
+class Checkpoint:
+    """
+    Progress of one stream, persisted as a small JSON file.
+
+    Attributes:
+        path (str): Location of the state file.
+        every (int): Write the file every `every` acknowledged batches.
+        state (dict): {'last_key': ..., 'batches': int} of the last
+                      acknowledged batch.
+    """
+
+    def __init__(self, path, every=1):
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        self.path = path
+        self.every = every
+        self.state = self.load()
+        self._unsaved = 0
+
+    def load(self):
+        """Reads the saved state, or returns a fresh one if there is none."""
+        try:
+            with open(self.path) as state_file:
+                return json.load(state_file)
+        except FileNotFoundError:
+            return {'last_key': None, 'batches': 0}
+
+    @property
+    def last_key(self):
+        return self.state['last_key']
+
+    def advance(self, last_key):
+        """
+        Records that the batch ending at last_key has been processed and
+        writes the file if `every` batches are pending. last_key must be
+        JSON serialisable or a Decimal, or a list of those.
+        """
+        self.state = {'last_key': last_key,
+                      'batches': self.state['batches'] + 1}
+        self._unsaved += 1
+        if self._unsaved >= self.every:
+            self.flush()
+
+    def flush(self):
+        """Writes any pending progress atomically."""
+        if not self._unsaved:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as state_file:
+            json.dump(self.state, state_file, default=_json_default)
+            state_file.flush()
+            os.fsync(state_file.fileno())
+        os.replace(tmp_path, self.path)
+        self._unsaved = 0
+
+    def complete(self):
+        """Removes the file once the stream has been fully consumed."""
+        self.state = {'last_key': None, 'batches': 0}
+        self._unsaved = 0
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Parallel, range-partitioned scans of user_data.
+
+The user_id key space is split into contiguous ranges that are scanned
+concurrently, one connection per range, and merged back into a single
+generator of batches.
+"""
+import contextlib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from seed import check_identifier, connect_to_prodev
+from rows import batch_factory
+
+# user_id values are UUID strings, so splitting the first 8 hex digits
+# evenly gives partitions of roughly equal size.
+_KEY_SPACE = 16 ** 8
+
+_DONE = object()
+
+
+def key_ranges(partitions):
+    """
+    Returns partitions (low, high) pairs covering every user_id. The first
+    low and the last high are None, meaning unbounded.
+    """
+    if partitions < 1:
+        raise ValueError("partitions must be at least 1")
+    bounds = [format(i * _KEY_SPACE // partitions, '08x')
+              for i in range(1, partitions)]
+    return list(zip([None] + bounds, bounds + [None]))
+
+
+def scan_partition(low, high, batch_size=1000, columns=None,
+                   row_format='dict', key='user_id'):
+    """
+    Yields batches of the rows with low <= key < high, in key order, over
+    a dedicated connection.
+    """
+    key = check_identifier(key)
+    select = ", ".join(map(check_identifier, columns)) if columns else "*"
+    conditions = []
+    params = []
+    if low is not None:
+        conditions.append(f"{key} >= %s")
+        params.append(low)
+    if high is not None:
+        conditions.append(f"{key} < %s")
+        params.append(high)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    connection = connect_to_prodev()
+    cursor = connection.cursor(buffered=False)
+    try:
+        cursor.execute(
+            f"SELECT {select} FROM user_data{where} ORDER BY {key}", params)
+        make_batch = batch_factory(cursor.column_names, row_format)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield make_batch(rows)
+    finally:
+        if connection.unread_result:
+            # The consumer stopped early: closing normally would fail with
+            # "Unread result found" (or drain the rest of the range), so
+            # drop the socket as stream_users does.
+            connection.shutdown()
+        else:
+            cursor.close()
+            connection.close()
+
+
+def _put(target, item, stop):
+    # Blocks while the queue is full, but gives up once the consumer left.
+    while not stop.is_set():
+        try:
+            target.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _scan_into(target, low, high, stop, scan_args):
+    try:
+        # closing() runs the scan's cleanup here, in the worker, as soon as
+        # the consumer has left.
+        with contextlib.closing(
+                scan_partition(low, high, **scan_args)) as batches:
+            for batch in batches:
+                if not _put(target, batch, stop):
+                    return
+    except Exception as exc:
+        _put(target, exc, stop)
+    finally:
+        _put(target, _DONE, stop)
+
+
+def partitioned_scan(workers=4, partitions=None, ordered=False,
+                     batch_size=1000, columns=None, row_format='dict',
+                     prefetch=4):
+    """
+    Scans user_data with a pool of worker threads and yields the batches
+    as one stream.
+
+    Args:
+        workers (int): Number of concurrent scans (and connections).
+        partitions (int): Number of key ranges, workers by default.
+        ordered (bool): Yield batches in user_id order. Otherwise batches
+                        are yielded as soon as any partition produces one.
+        batch_size (int): Rows per batch.
+        columns (sequence): Columns to select, all columns by default.
+        row_format (str): Batch representation, see rows.BATCH_FORMATS.
+        prefetch (int): Batches buffered per partition, which bounds memory.
+
+    Yields:
+        list: Batches of rows as produced by scan_partition.
+    """
+    ranges = key_ranges(partitions or workers)
+    scan_args = {'batch_size': batch_size, 'columns': columns,
+                 'row_format': row_format}
+    stop = threading.Event()
+    if ordered:
+        queues = [queue.Queue(prefetch) for _ in ranges]
+    else:
+        shared = queue.Queue(prefetch * len(ranges))
+        queues = [shared] * len(ranges)
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for target, (low, high) in zip(queues, ranges):
+            executor.submit(_scan_into, target, low, high, stop, scan_args)
+
+        # In ordered mode each partition queue is drained in turn; in
+        # unordered mode the shared queue is drained until every partition
+        # has reported that it is done.
+        pending = len(ranges)
+        index = 0
+        while pending:
+            item = queues[index].get()
+            if item is _DONE:
+                pending -= 1
+                if ordered:
+                    index += 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        stop.set()
+        executor.shutdown(wait=True)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Row representations shared by the user_data generators.
+
+'dict' rows repeat every key string per row. For large streams the
+compact formats are cheaper:
+
+- 'tuple' and 'namedtuple' keep only the values.
+- 'record' uses a __slots__ class, so there is no per-row __dict__.
+- 'columns' (batches only) stores one list or array per column.
+"""
+import keyword
+from array import array
+from collections import namedtuple
+
+ROW_FORMATS = ('dict', 'tuple', 'namedtuple', 'record')
+BATCH_FORMATS = ROW_FORMATS + ('columns',)
+
+# Columns stored as typed arrays in 'columns' batches of user_data.
+USER_TYPECODES = {'age': 'q'}
+
+_record_classes = {}
+
+
+def record_class(column_names):
+    """
+    Returns a __slots__ record class for the given columns, creating and
+    caching it on first use.
+    """
+    columns = tuple(column_names)
+    cls = _record_classes.get(columns)
+    if cls is None:
+        for name in columns:
+            if not name.isidentifier() or keyword.iskeyword(name):
+                raise ValueError(f"Invalid column name: {name!r}")
+        # Generated like namedtuple's __new__ so each row costs plain
+        # attribute stores rather than a setattr() loop.
+        namespace = {}
+        exec(f"def __init__(self, {', '.join(columns)}):\n"
+             + "".join(f"    self.{name} = {name}\n" for name in columns),
+             namespace)
+        __init__ = namespace['__init__']
+
+        def __repr__(self):
+            fields = ", ".join(
+                f"{name}={getattr(self, name)!r}" for name in columns)
+            return f"UserRecord({fields})"
+
+        def as_dict(self):
+            return {name: getattr(self, name) for name in columns}
+
+        cls = type('UserRecord', (), {
+            '__slots__': columns,
+            '__init__': __init__,
+            '__repr__': __repr__,
+            'as_dict': as_dict,
+        })
+        _record_classes[columns] = cls
+    return cls
+
+
+class ColumnBatch:
+    """
+    A batch of rows stored column by column.
+
+    Columns listed in typecodes are stored as array.array of that type and
+    the rest as lists. batch['age'] returns a whole column.
+    """
+
+    __slots__ = ('column_names', 'columns', '_length')
+
+    def __init__(self, column_names, rows, typecodes=None):
+        typecodes = USER_TYPECODES if typecodes is None else typecodes
+        self.column_names = tuple(column_names)
+        self._length = len(rows)
+        values = zip(*rows) if rows else ([] for _ in self.column_names)
+        self.columns = {}
+        for name, column in zip(self.column_names, values):
+            typecode = typecodes.get(name)
+            if typecode is None:
+                self.columns[name] = list(column)
+            elif typecode in 'fd':
+                self.columns[name] = array(typecode, map(float, column))
+            else:
+                self.columns[name] = array(typecode, map(int, column))
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def rows(self):
+        """Iterates over the batch as row tuples."""
+        return zip(*(self.columns[name] for name in self.column_names))
+
+
+def row_factory(column_names, row_format='dict'):
+    """
+    Returns a function that turns a raw row tuple into the requested format.
+
+    Args:
+        column_names (sequence): Column names in cursor order.
+        row_format (str): One of ROW_FORMATS.
+
+    Returns:
+        callable: Takes a row tuple and returns the formatted row.
+    """
+    if row_format == 'dict':
+        columns = tuple(column_names)
+        return lambda row: dict(zip(columns, row))
+    if row_format == 'tuple':
+        return tuple
+    if row_format == 'namedtuple':
+        return namedtuple('UserRow', column_names)._make
+    if row_format == 'record':
+        cls = record_class(column_names)
+        return lambda row: cls(*row)
+    raise ValueError(
+        f"Unknown row_format {row_format!r}; expected one of {ROW_FORMATS}")
+
+
+def batch_factory(column_names, row_format='dict'):
+    """
+    Returns a function that turns a list of raw row tuples into a batch:
+    a list of formatted rows, or a ColumnBatch for 'columns'.
+    """
+    if row_format == 'columns':
+        columns = tuple(column_names)
+        return lambda rows: ColumnBatch(columns, rows)
+    if row_format not in BATCH_FORMATS:
+        raise ValueError(
+            f"Unknown row_format {row_format!r}; "
+            f"expected one of {BATCH_FORMATS}")
+    make_row = row_factory(column_names, row_format)
+    if row_format == 'tuple':
+        return list
+    return lambda rows: [make_row(row) for row in rows]
@@ -1,12 +1,45 @@
 import mysql.connector
+import mysql.connector.pooling
 import csv
+import re
+import threading
+import time
+
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "password": "yourpassword",
+}
+DATABASE = "ALX_prodev"
+
+USER_COLUMNS = ('user_id', 'name', 'email', 'age')
+
+# ALX_prodev connections opened and the total time spent opening them.
+# Updated from worker threads by partitioned scans, hence the lock.
+connection_stats = {'connects': 0, 'seconds': 0.0}
+_connection_stats_lock = threading.Lock()
+
+
+def _record_connects(connects, seconds):
+    with _connection_stats_lock:
+        connection_stats['connects'] += connects
+        connection_stats['seconds'] += seconds
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def check_identifier(name):
+    """
+    Returns name if it is a plain SQL identifier, raises ValueError otherwise.
+    Table and column names cannot be bound as parameters, so anything
+    interpolated into SQL goes through this check first.
+    """
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid identifier: {name!r}")
+    return name
 
 def connect_db():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="yourpassword"
-    )
+    return mysql.connector.connect(**DB_CONFIG)
 
 def create_database(connection):
     cursor = connection.cursor()
@@ -15,12 +48,25 @@ def create_database(connection):
     cursor.close()
 
 def connect_to_prodev():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="yourpassword",
-        database="ALX_prodev"
+    start = time.perf_counter()
+    connection = mysql.connector.connect(**DB_CONFIG, database=DATABASE)
+    _record_connects(1, time.perf_counter() - start)
+    return connection
+
+def create_pool(pool_size=5, pool_name="prodev"):
+    """
+    Creates a pool of ALX_prodev connections. Closing a connection taken
+    from the pool with get_connection() returns it to the pool.
+    """
+    start = time.perf_counter()
+    pool = mysql.connector.pooling.MySQLConnectionPool(
+        pool_name=pool_name,
+        pool_size=pool_size,
+        database=DATABASE,
+        **DB_CONFIG
     )
+    _record_connects(pool_size, time.perf_counter() - start)
+    return pool
 
 def create_table(connection):
     cursor = connection.cursor()
@@ -47,3 +93,68 @@ def insert_data(connection, file_path):
             """, (row['user_id'], row['name'], row['email'], row['age']))
     connection.commit()
     cursor.close()
+
+
+def read_csv_batches(file_path, batch_size):
+    """
+    Streams the CSV file and yields lists of up to batch_size row tuples.
+    """
+    with open(file_path, newline='') as csvfile:
+        reader = csv.DictReader(csvfile)
+        batch = []
+        for row in reader:
+            batch.append(tuple(row[column] for column in USER_COLUMNS))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+# mysql-connector's executemany() rewrites an INSERT (IGNORE) ... VALUES
+# statement into a single multi-row INSERT for the whole sequence.
+_BULK_INSERT = ("INSERT IGNORE INTO user_data (user_id, name, email, age) "
+                "VALUES (%s, %s, %s, %s)")
+
+
+def bulk_insert_data(connection, file_path, batch_size=1000, commit_every=10):
+    """
+    Loads the CSV into user_data using one multi-row INSERT per batch.
+
+    Rows are read as a stream, grouped into batches of batch_size and sent
+    with executemany(), which mysql-connector sends as a single
+    `INSERT IGNORE ... VALUES (...), (...)` statement per batch. The
+    transaction is committed every commit_every batches and once at the end.
+
+    Args:
+        connection: An open connection to ALX_prodev.
+        file_path (str): Path to the CSV file.
+        batch_size (int): Number of rows per INSERT statement.
+        commit_every (int): Number of batches per commit.
+
+    Returns:
+        int: The number of rows read from the CSV file.
+    """
+    if batch_size < 1 or commit_every < 1:
+        raise ValueError("batch_size and commit_every must be positive")
+
+    cursor = connection.cursor()
+    total = 0
+    pending = 0
+    start = time.perf_counter()
+    try:
+        for batch in read_csv_batches(file_path, batch_size):
+            cursor.executemany(_BULK_INSERT, batch)
+            total += len(batch)
+            pending += 1
+            if pending == commit_every:
+                connection.commit()
+                pending = 0
+        connection.commit()
+    finally:
+        cursor.close()
+
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else float('inf')
+    print(f"Inserted {total} rows in {elapsed:.2f}s ({rate:.0f} rows/s)")
+    return total
@@ -0,0 +1,76 @@
+import importlib
+import os
+import sys
+
+import pytest
+from mysql.connector.errors import InternalError
+
+# The modules under test live next to the numbered exercise files, which
+# are imported by plain name.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+USER_ROWS = [(f"u{i:02}", f"user{i}", f"user{i}@example.com", 20 + i % 5)
+             for i in range(10)]
+
+
+class FakeCursor:
+    """Unbuffered cursor over USER_ROWS that fails like mysql-connector."""
+
+    column_names = ('user_id', 'name', 'email', 'age')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        self.connection.statements.append((sql, tuple(params)))
+        rows = USER_ROWS
+        if params:
+            rows = [row for row in rows if row[0] > params[0]]
+        self.rows = list(rows)
+
+    def fetchmany(self, size=1):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        if self.rows:
+            raise InternalError("Unread result found")
+        self.connection.cursor_closed = True
+
+
+class FakeConnection:
+    def __init__(self):
+        self.statements = []
+        self.cursors = []
+        self.cursor_closed = self.closed = self.shut_down = False
+
+    @property
+    def unread_result(self):
+        return any(cursor.rows for cursor in self.cursors)
+
+    def cursor(self, **options):
+        cursor = FakeCursor(self)
+        self.cursors.append(cursor)
+        return cursor
+
+    def close(self):
+        if self.unread_result:
+            raise InternalError("Unread result found")
+        self.closed = True
+
+    def shutdown(self):
+        self.shut_down = True
+
+
+@pytest.fixture
+def batch_processing():
+    return importlib.import_module('1-batch_processing')
+
+
+@pytest.fixture
+def connection(batch_processing, monkeypatch):
+    connection = FakeConnection()
+    monkeypatch.setattr(batch_processing, 'connect_to_prodev',
+                        lambda: connection)
+    return connection
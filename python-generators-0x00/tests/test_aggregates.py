@@ -0,0 +1,75 @@
+import statistics
+from decimal import Decimal
+
+import pytest
+
+from aggregates import RunningStats, aggregate
+
+AGES = [Decimal('18'), Decimal('25.5'), None, Decimal('40'), Decimal('61')]
+BUCKETS = [0, 30, 60, 90]
+
+
+class FakeCursor:
+    """Returns the aggregate row MySQL gives for a DECIMAL column."""
+
+    def __init__(self, values):
+        self.values = [value for value in values if value is not None]
+
+    def execute(self, sql, params=()):
+        values = self.values
+        buckets = [Decimal(sum(low <= value < high for value in values))
+                   if values else None
+                   for low, high in zip(params[::2], params[1::2])]
+        if not values:
+            self.row = (0, None, None, None, None, None, *buckets)
+            return
+        self.row = (len(values), sum(values),
+                    sum(values) / len(values), min(values), max(values),
+                    statistics.pvariance(map(float, values)), *buckets)
+
+    def fetchone(self):
+        return self.row
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, values):
+        self.values = values
+
+    def cursor(self):
+        return FakeCursor(self.values)
+
+
+def test_decimal_input_is_accepted():
+    stats = RunningStats().update([Decimal('1.5'), 2, 3.5])
+    assert stats.as_dict()['sum'] == 7.0
+    assert stats.min == 1.5
+
+
+def test_both_paths_give_the_same_statistics():
+    python = aggregate(iter(AGES), buckets=BUCKETS)
+    sql = aggregate(FakeConnection(AGES), buckets=BUCKETS)
+    assert python.keys() == sql.keys()
+    for name in ('count', 'sum', 'min', 'max', 'histogram'):
+        assert python[name] == sql[name]
+        assert type(python[name]) is type(sql[name])
+    for name in ('mean', 'variance'):
+        assert python[name] == pytest.approx(sql[name])
+        assert type(python[name]) is type(sql[name]) is float
+    assert python['count'] == 4
+    assert python['histogram'] == {(0, 30): 2, (30, 60): 1, (60, 90): 1}
+
+
+def test_integer_input_gives_float_statistics():
+    stats = aggregate(iter([20, 30]))
+    assert (stats['sum'], stats['min'], stats['max']) == (50.0, 20.0, 30.0)
+    assert all(type(stats[name]) is float
+               for name in ('sum', 'mean', 'min', 'max', 'variance'))
+
+
+def test_both_paths_agree_on_no_rows():
+    python = aggregate(iter([None]), buckets=BUCKETS)
+    assert python == aggregate(FakeConnection([]), buckets=BUCKETS)
+    assert python['count'] == 0 and python['sum'] is None
@@ -0,0 +1,16 @@
+import asyncio
+import contextlib
+
+import async_streams
+
+
+def test_breaking_early_releases_the_connection(connection):
+    async def consume():
+        batches = async_streams.async_stream_users_in_batches(
+            2, driver='thread')
+        async with contextlib.aclosing(batches):
+            async for batch in batches:
+                return batch
+
+    assert len(asyncio.run(consume())) == 2
+    assert connection.shut_down
@@ -0,0 +1,53 @@
+from decimal import Decimal
+
+from checkpoint import Checkpoint
+
+from conftest import USER_ROWS
+
+
+def test_decimal_keys_round_trip(tmp_path):
+    path = str(tmp_path / 'state.json')
+    Checkpoint(path).advance([Decimal('32.5'), 'u07'])
+    assert Checkpoint(path).state == {'last_key': ['32.5', 'u07'],
+                                      'batches': 1}
+
+
+def test_resume_after_last_recorded_batch(tmp_path, batch_processing,
+                                          connection):
+    path = str(tmp_path / 'state.json')
+    batches = batch_processing.stream_users_in_batches(
+        3, row_format='tuple', checkpoint=Checkpoint(path))
+    next(batches)
+    next(batches)           # acknowledges the first batch
+    batches.close()
+
+    resumed = batch_processing.stream_users_in_batches(
+        3, row_format='tuple', checkpoint=Checkpoint(path))
+    assert next(resumed) == USER_ROWS[3:6]
+    assert connection.statements[-1][1] == ('u02',)
+
+
+def test_early_close_flushes_and_drops_the_connection(tmp_path,
+                                                       batch_processing,
+                                                       connection):
+    path = str(tmp_path / 'state.json')
+    batches = batch_processing.stream_users_in_batches(
+        2, checkpoint=Checkpoint(path, every=5))
+    for _ in range(4):      # acknowledges three batches
+        next(batches)
+    batches.close()
+    assert Checkpoint(path).state == {'last_key': 'u05', 'batches': 3}
+    assert connection.shut_down and not connection.closed
+
+
+def test_finished_stream_removes_the_checkpoint(tmp_path, batch_processing,
+                                                connection):
+    path = tmp_path / 'state.json'
+    checkpoint = Checkpoint(str(path))
+    checkpoint.advance('u00')
+    assert path.exists()
+    rows = [row for batch in batch_processing.stream_users_in_batches(
+        4, row_format='tuple', checkpoint=checkpoint) for row in batch]
+    assert rows == USER_ROWS[1:]
+    assert not path.exists()
+    assert connection.cursor_closed and connection.closed
@@ -0,0 +1,90 @@
+import uuid
+
+import pytest
+
+import partitioned
+from conftest import FakeConnection, FakeCursor
+from partitioned import key_ranges, partitioned_scan
+
+
+def user_rows(count):
+    # Spread over the whole key space, first and last prefixes included.
+    step = (2 ** 128 - 1) // max(count - 1, 1)
+    return [(str(uuid.UUID(int=i * step)), f"user{i}", f"u{i}@x", 20)
+            for i in range(count)]
+
+
+class RangeCursor(FakeCursor):
+    def execute(self, sql, params=()):
+        params = list(params)
+        low = params.pop(0) if '>= %s' in sql else None
+        high = params.pop(0) if '< %s' in sql else None
+        self.rows = sorted(
+            row for row in self.connection.table
+            if (low is None or row[0] >= low)
+            and (high is None or row[0] < high))
+
+
+class RangeConnection(FakeConnection):
+    def __init__(self, table):
+        super().__init__()
+        self.table = table
+
+    def cursor(self, **options):
+        cursor = RangeCursor(self)
+        self.cursors.append(cursor)
+        return cursor
+
+
+class Table(list):
+    pass
+
+
+@pytest.fixture
+def users(monkeypatch):
+    users = Table()
+    users.connections = []
+
+    def connect():
+        users.connections.append(RangeConnection(users))
+        return users.connections[-1]
+    monkeypatch.setattr(partitioned, 'connect_to_prodev', connect)
+    return users
+
+
+def test_one_range_is_unbounded():
+    assert key_ranges(1) == [(None, None)]
+    with pytest.raises(ValueError):
+        key_ranges(0)
+
+
+@pytest.mark.parametrize('partitions', [2, 3, 7, 16])
+def test_ranges_cover_every_key_once(partitions):
+    ranges = key_ranges(partitions)
+    assert len(ranges) == partitions
+    assert ranges[0][0] is None and ranges[-1][1] is None
+    for (_, high), (low, _) in zip(ranges, ranges[1:]):
+        assert high == low
+    for user_id, *_ in user_rows(50):
+        owners = [(low, high) for low, high in ranges
+                  if (low is None or user_id >= low)
+                  and (high is None or user_id < high)]
+        assert len(owners) == 1
+
+
+def test_empty_table(users):
+    assert list(partitioned_scan(workers=4)) == []
+    assert len(users.connections) == 4
+    assert all(conn.closed for conn in users.connections)
+
+
+@pytest.mark.parametrize('ordered', [False, True])
+def test_fewer_rows_than_workers(users, ordered):
+    users.extend(user_rows(3))
+    batches = list(partitioned_scan(workers=8, ordered=ordered,
+                                    row_format='tuple'))
+    rows = [row for batch in batches for row in batch]
+    assert sorted(rows) == sorted(users)
+    if ordered:
+        assert rows == sorted(users)
+    assert all(conn.closed for conn in users.connections)
@@ -0,0 +1,55 @@
+from array import array
+
+import pytest
+
+from rows import ColumnBatch, batch_factory, record_class, row_factory
+
+COLUMNS = ('user_id', 'name', 'email', 'age')
+ROW = ('u01', 'Ann', 'ann@example.com', 31)
+
+
+def test_row_formats_hold_the_same_values():
+    assert row_factory(COLUMNS, 'dict')(ROW) == dict(zip(COLUMNS, ROW))
+    assert row_factory(COLUMNS, 'tuple')(list(ROW)) == ROW
+    named = row_factory(COLUMNS, 'namedtuple')(ROW)
+    assert (named.user_id, named.age) == ('u01', 31)
+    record = row_factory(COLUMNS, 'record')(ROW)
+    assert record.as_dict() == dict(zip(COLUMNS, ROW))
+    assert repr(record).startswith("UserRecord(user_id='u01'")
+
+
+def test_records_have_no_instance_dict():
+    record = row_factory(COLUMNS, 'record')(ROW)
+    assert not hasattr(record, '__dict__')
+    assert record_class(COLUMNS) is type(record)
+
+
+def test_invalid_names_and_formats_are_rejected():
+    with pytest.raises(ValueError):
+        record_class(('user id',))
+    with pytest.raises(ValueError):
+        record_class(('class',))
+    with pytest.raises(ValueError):
+        row_factory(COLUMNS, 'columns')
+    with pytest.raises(ValueError):
+        batch_factory(COLUMNS, 'xml')
+
+
+def test_batches_in_every_format():
+    rows = [ROW, ('u02', 'Bo', 'bo@example.com', 45)]
+    assert batch_factory(COLUMNS, 'tuple')(rows) == rows
+    assert [row['name'] for row in batch_factory(COLUMNS)(rows)] == \
+        ['Ann', 'Bo']
+    batch = batch_factory(COLUMNS, 'columns')(rows)
+    assert isinstance(batch, ColumnBatch) and len(batch) == 2
+    assert batch['age'] == array('q', [31, 45])
+    assert batch['name'] == ['Ann', 'Bo']
+    assert list(batch.rows()) == rows
+
+
+def test_empty_column_batch_keeps_its_columns():
+    batch = ColumnBatch(COLUMNS, [])
+    assert len(batch) == 0
+    assert batch['age'] == array('q')
+    assert batch['name'] == []
+    assert list(batch.rows()) == []